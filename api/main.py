@@ -1,13 +1,26 @@
 from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from typing import List, Optional
-import json
-from utils.yfinance_utils import YFinanceUtils
-from utils.sec_api_utils import SecApiUtils
-from utils.finnhub_utils import FinnhubUtils
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, BeforeValidator, ConfigDict, ValidationError, create_model
+from typing import Annotated, Any, Iterator, List, Optional, Type
+import os
+import inspect
+import asyncio
+from functools import lru_cache
+from utils.yfinance_utils import YFinanceUtils, STATEMENT_ATTRIBUTES, get_ticker_pool, get_statement_cache
+from utils.sec_api_utils import get_sec_api_utils
+from utils.finnhub_utils import get_finnhub_utils, get_finnhub_rate_limiter
+from utils.executor_utils import run_upstream, run_upstream_bulk, get_upstream_executor, UpstreamTimeoutError
+from utils.ratelimit_utils import UpstreamRateLimitError
+from utils.sec_api_utils import get_sec_api_rate_limiter
+from utils.section_store import CHUNK_CHARS
+from utils.filing_index import get_filing_index
+from utils.http_utils import http_session_stats
+from utils.serialization_utils import FastJSONResponse
+from utils.other_utils import load_env
+from utils.metrics_utils import registry, GaugeCallback, MetricsMiddleware, sample_event_loop_lag
 from fastapi.middleware.cors import CORSMiddleware
 
-app = FastAPI()
+app = FastAPI(default_response_class=FastJSONResponse)
 origins = [
     "http://localhost:3000",
     "http://127.0.0.1:3000",   
@@ -22,25 +35,98 @@ app.add_middleware(
     allow_headers=["*"], 
 )
 
+@lru_cache(maxsize=None)
+def app_route_paths() -> frozenset:
+    return frozenset(route.path for route in app.routes)
+
+app.add_middleware(MetricsMiddleware, route_paths=app_route_paths)
+
+@app.on_event("startup")
+async def start_event_loop_lag_sampler():
+    interval = float(os.environ.get("METRICS_LOOP_LAG_INTERVAL", 0.5))
+    app.state.loop_lag_sampler = asyncio.create_task(sample_event_loop_lag(interval))
+
+@app.on_event("startup")
+def start_watchlist_prefetch():
+    # FinnhubUtils starts refreshing the WATCHLIST symbols as soon as it is created
+    load_env()
+    if os.environ.get("WATCHLIST"):
+        get_finnhub_utils()
+
+@app.on_event("shutdown")
+def shutdown_upstream_executor():
+    if get_finnhub_utils.cache_info().currsize:
+        get_finnhub_utils().refresher.stop()
+    if get_upstream_executor.cache_info().currsize:
+        get_upstream_executor().shutdown()
+
+
 class IncomeStatementResponse(BaseModel):
     symbol: str
     income_statement: dict
 
+def fetch_income_stmt(symbol: str) -> dict:
+    return YFinanceUtils(symbol).get_income_stmt()
+
 @app.get("/api/py/get_income_statement", response_model=IncomeStatementResponse)
 async def get_income_statement(symbol: str):
     """Retrieve and format a detailed profile of a company using its stock ticker symbol. 
         example http://127.0.0.1:8000/api/py/get_income_statement?symbol=AAPL"""
     if not symbol:
         raise HTTPException(status_code=400, detail="Symbol parameter is required.")
+    symbol = symbol.strip().upper()
 
-    yfin = YFinanceUtils(symbol)
     try:
-        income_stmt = yfin.get_income_stmt()
-        return {"symbol": symbol, "income_statement": income_stmt}
+        income_stmt = await run_upstream("yfinance", fetch_income_stmt, symbol)
+        return FastJSONResponse({"symbol": symbol, "income_statement": income_stmt})
+    except UpstreamTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except UpstreamRateLimitError as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+BULK_STATEMENTS_MAX_SYMBOLS = 50
+
+def fetch_statements(symbol: str, statements: tuple, freq: str) -> dict:
+    return YFinanceUtils(symbol).get_statements(statements, freq)
+
+class FinancialStatementsResponse(BaseModel):
+    freq: str
+    statements: dict
+    errors: dict
+
+@app.get("/api/py/get_financial_statements", response_model=FinancialStatementsResponse)
+async def get_financial_statements(symbols: str, statements: str = "income_statement,balance_sheet,cash_flow", freq: str = "annual"):
+    """Retrieve financial statements of several companies at once, e.g. symbols=AAPL,MSFT&statements=income_statement,cash_flow.
+        Symbols are fetched concurrently; a symbol that fails is reported in errors without failing the others."""
+    symbol_list = list(dict.fromkeys(symbol.strip().upper() for symbol in symbols.split(",") if symbol.strip()))
+    statement_list = tuple(dict.fromkeys(statement.strip().lower() for statement in statements.split(",") if statement.strip()))
+    if not symbol_list or not statement_list:
+        raise HTTPException(status_code=400, detail="Symbols and statements parameters are required.")
+    if len(symbol_list) > BULK_STATEMENTS_MAX_SYMBOLS:
+        raise HTTPException(status_code=400, detail=f"At most {BULK_STATEMENTS_MAX_SYMBOLS} symbols per request.")
+    invalid = [statement for statement in statement_list if statement not in STATEMENT_ATTRIBUTES]
+    if invalid or freq not in ["annual", "quarterly"]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"statements must be among {', '.join(STATEMENT_ATTRIBUTES)} and freq either 'annual' or 'quarterly'.",
+        )
+
+    results = await asyncio.gather(
+        *[run_upstream_bulk("yfinance", fetch_statements, symbol, statement_list, freq) for symbol in symbol_list],
+        return_exceptions=True,
+    )
+    output, errors = {}, {}
+    for symbol, result in zip(symbol_list, results):
+        if isinstance(result, Exception):
+            errors[symbol] = str(result)
+        else:
+            output[symbol] = result
+    return FastJSONResponse({"freq": freq, "statements": output, "errors": errors})
+
+
 class SecSectionResponse(BaseModel):
     symbol: str
     section: str
@@ -52,23 +138,359 @@ async def get_10k_section(ticker_symbol: str, section: str, fyear: Optional[str]
     """Get a specific section of a 10-K report from the SEC API."""
     if not ticker_symbol or not section:
         raise HTTPException(status_code=400, detail="Ticker symbol and section are required.")
+    ticker_symbol, section = ticker_symbol.strip().upper(), section.strip().upper()
     
-    sec_api_extractor = SecApiUtils()
+    sec_api_extractor = get_sec_api_utils()
     try:
-        section_text = sec_api_extractor.get_10k_section(ticker_symbol=ticker_symbol, section=section, fyear=fyear, report_address=report_address)
-        return {
+        section_text = await run_upstream("sec_api", sec_api_extractor.get_10k_section, ticker_symbol=ticker_symbol, section=section, fyear=fyear, report_address=report_address)
+        return FastJSONResponse({
             "symbol": ticker_symbol,
             "section": section,
             "fiscal_year": fyear,
             "section_text": section_text
+        })
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UpstreamTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except UpstreamRateLimitError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+class SecSectionsResponse(BaseModel):
+    symbol: str
+    fiscal_year: Optional[str]
+    report_url: str
+    sections: dict
+
+@app.get("/api/py/get_10k_sections", response_model=SecSectionsResponse)
+async def get_10k_sections(ticker_symbol: str, sections: str, fyear: Optional[str] = None, report_address: Optional[str] = None):
+    """Get several sections of the same 10-K report, e.g. sections=1A,7,7A.
+        The report url is resolved once and the sections are extracted concurrently."""
+    if not ticker_symbol or not sections:
+        raise HTTPException(status_code=400, detail="Ticker symbol and sections are required.")
+    ticker_symbol = ticker_symbol.strip().upper()
+
+    sec_api_extractor = get_sec_api_utils()
+    try:
+        section_list = list(dict.fromkeys(
+            sec_api_extractor.validate_10k_section(section.strip().upper()) for section in sections.split(",") if section.strip()
+        ))
+        if report_address is None:
+            report_address = await run_upstream("finnhub", sec_api_extractor.resolve_10k_report_url, ticker_symbol, fyear)
+        section_texts = await asyncio.gather(*[
+            run_upstream("sec_api", sec_api_extractor.get_10k_section, ticker_symbol=ticker_symbol, section=section, fyear=fyear, report_address=report_address)
+            for section in section_list
+        ])
+        return FastJSONResponse({
+            "symbol": ticker_symbol,
+            "fiscal_year": fyear,
+            "report_url": report_address,
+            "sections": dict(zip(section_list, section_texts)),
+        })
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UpstreamTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except UpstreamRateLimitError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+SEARCH_MAX_PASSAGES = 50
+
+def comma_list(value: Optional[str], upper: bool = True) -> Optional[List[str]]:
+    if not value:
+        return None
+    items = [item.strip().upper() if upper else item.strip() for item in value.split(",") if item.strip()]
+    return items or None
+
+class PassageSearchResponse(BaseModel):
+    query: str
+    passages: List[dict]
+
+@app.get("/api/py/search_10k_passages", response_model=PassageSearchResponse)
+async def search_10k_passages(query: str, k: int = 5, symbols: Optional[str] = None, years: Optional[str] = None, sections: Optional[str] = None):
+    """Search the passages of every 10-K section retrieved so far, e.g. query=supply chain risk&symbols=AAPL,MSFT&sections=1A.
+        Answers from the local passage index only: sections must have been fetched once with a get_10k_section* endpoint."""
+    if not query.strip():
+        raise HTTPException(status_code=400, detail="Query parameter is required.")
+    if not 0 < k <= SEARCH_MAX_PASSAGES:
+        raise HTTPException(status_code=400, detail=f"k must be between 1 and {SEARCH_MAX_PASSAGES}.")
+
+    sec_api_extractor = get_sec_api_utils()
+    try:
+        passages = await asyncio.to_thread(
+            sec_api_extractor.search_10k_passages, query, k, comma_list(symbols), comma_list(years, upper=False), comma_list(sections)
+        )
+        return FastJSONResponse({"query": query, "passages": passages})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+MAX_SECTION_RANGE_CHARS = 256 * 1024
+
+class SecSectionManifestResponse(BaseModel):
+    symbol: str
+    section: str
+    fiscal_year: Optional[str]
+    report_url: str
+    length: int
+    chunk_size: int
+    num_chunks: int
+
+@app.get("/api/py/get_10k_section/manifest", response_model=SecSectionManifestResponse)
+async def get_10k_section_manifest(ticker_symbol: str, section: str, fyear: Optional[str] = None, report_address: Optional[str] = None, chunk_size: int = CHUNK_CHARS):
+    """Get the length of a 10-K section and the number of chunks of chunk_size characters it spans,
+        to page through it with /api/py/get_10k_section/range."""
+    if not ticker_symbol or not section:
+        raise HTTPException(status_code=400, detail="Ticker symbol and section are required.")
+    if not 0 < chunk_size <= MAX_SECTION_RANGE_CHARS:
+        raise HTTPException(status_code=400, detail=f"chunk_size must be between 1 and {MAX_SECTION_RANGE_CHARS}.")
+    ticker_symbol, section = ticker_symbol.strip().upper(), section.strip().upper()
+
+    sec_api_extractor = get_sec_api_utils()
+    try:
+        manifest = await run_upstream("sec_api", sec_api_extractor.get_10k_section_manifest, ticker_symbol=ticker_symbol, section=section, fyear=fyear, report_address=report_address, chunk_size=chunk_size)
+        return {"symbol": ticker_symbol, "section": section, "fiscal_year": fyear, **manifest}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UpstreamTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except UpstreamRateLimitError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+class SecSectionRangeResponse(BaseModel):
+    symbol: str
+    section: str
+    fiscal_year: Optional[str]
+    offset: int
+    total_length: int
+    next_offset: Optional[int]
+    section_text: str
+
+@app.get("/api/py/get_10k_section/range", response_model=SecSectionRangeResponse)
+async def get_10k_section_range(ticker_symbol: str, section: str, fyear: Optional[str] = None, report_address: Optional[str] = None, offset: int = 0, length: int = CHUNK_CHARS, chunk: Optional[int] = None):
+    """Get part of a 10-K section: length characters from offset, or the chunk-th chunk of length characters.
+        next_offset is null once the end of the section is reached."""
+    if not ticker_symbol or not section:
+        raise HTTPException(status_code=400, detail="Ticker symbol and section are required.")
+    if not 0 < length <= MAX_SECTION_RANGE_CHARS:
+        raise HTTPException(status_code=400, detail=f"length must be between 1 and {MAX_SECTION_RANGE_CHARS}.")
+    if chunk is not None:
+        offset = chunk * length
+    if offset < 0:
+        raise HTTPException(status_code=400, detail="offset and chunk must not be negative.")
+    ticker_symbol, section = ticker_symbol.strip().upper(), section.strip().upper()
+
+    sec_api_extractor = get_sec_api_utils()
+    try:
+        result = await run_upstream("sec_api", sec_api_extractor.get_10k_section_range, ticker_symbol=ticker_symbol, section=section, fyear=fyear, report_address=report_address, offset=offset, length=length)
+        end = offset + len(result["section_text"])
+        return {
+            "symbol": ticker_symbol,
+            "section": section,
+            "fiscal_year": fyear,
+            "offset": offset,
+            "total_length": result["total_length"],
+            "next_offset": end if end < result["total_length"] else None,
+            "section_text": result["section_text"],
         }
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except UpstreamTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except UpstreamRateLimitError as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-finnhub_utils = FinnhubUtils()
+def sse_events(chunks: Iterator[str]) -> Iterator[str]:
+    """Wrap text chunks as server-sent events: one 'chunk' event per chunk, then a 'done' event."""
+    for chunk in chunks:
+        data = "\n".join(f"data: {line}" for line in chunk.split("\n"))
+        yield f"event: chunk\n{data}\n\n"
+    yield "event: done\ndata: \n\n"
+
+@app.get("/api/py/get_10k_section/stream")
+async def stream_10k_section(ticker_symbol: str, section: str, fyear: Optional[str] = None, report_address: Optional[str] = None, format: str = "text", chunk_size: int = 8 * 1024):
+    """Stream a 10-K section as chunked plain text (format=text) or server-sent events (format=sse),
+        reading it chunk by chunk from the local section store."""
+    if not ticker_symbol or not section:
+        raise HTTPException(status_code=400, detail="Ticker symbol and section are required.")
+    if format not in ["text", "sse"]:
+        raise HTTPException(status_code=400, detail="format must be either 'text' or 'sse'.")
+    if not 0 < chunk_size <= MAX_SECTION_RANGE_CHARS:
+        raise HTTPException(status_code=400, detail=f"chunk_size must be between 1 and {MAX_SECTION_RANGE_CHARS}.")
+    ticker_symbol, section = ticker_symbol.strip().upper(), section.strip().upper()
+
+    sec_api_extractor = get_sec_api_utils()
+    try:
+        report_address, section = await run_upstream("sec_api", sec_api_extractor.store_10k_section, ticker_symbol=ticker_symbol, section=section, fyear=fyear, report_address=report_address)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UpstreamTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except UpstreamRateLimitError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    chunks = sec_api_extractor.iter_10k_section(ticker_symbol, fyear, section, report_address=report_address, chunk_size=chunk_size)
+    if format == "sse":
+        return StreamingResponse(sse_events(chunks), media_type="text/event-stream")
+    return StreamingResponse(chunks, media_type="text/plain; charset=utf-8")
+
+
+@app.get("/api/py/cache")
+async def get_cache_stats():
+    """Hit/miss counters of the in-memory Finnhub and yfinance caches, size of the news store and upstream call coalescing."""
+    finnhub_utils = get_finnhub_utils()
+    return {
+        "finnhub": finnhub_utils.cache_stats(),
+        "news_store": finnhub_utils.news_store.stats(),
+        "yfinance_statements": get_statement_cache().stats(),
+        "yfinance_tickers": get_ticker_pool().stats(),
+        "single_flight": get_upstream_executor().single_flight.stats(),
+    }
+
+
+@app.delete("/api/py/cache")
+async def invalidate_cache(symbol: Optional[str] = None, endpoint: Optional[str] = None):
+    """Drop cached Finnhub responses, optionally only for one symbol and/or endpoint (e.g. 'quote')."""
+    if symbol:
+        symbol = symbol.strip().upper()
+    removed = get_finnhub_utils().invalidate_cache(symbol=symbol, endpoint=endpoint)
+    return {"removed": removed}
+
+
+class FilingIndexRequest(BaseModel):
+    symbols: List[str]
+    form: str = "10-K"
+    from_date: Optional[str] = None
+
+@app.get("/api/py/filing_index")
+async def get_filing_index_status(symbol: Optional[str] = None, form: Optional[str] = None):
+    """Size of the local SEC filing index, and the indexed filings of symbol if given."""
+    filing_index = get_filing_index()
+    if symbol:
+        return {"symbol": symbol.strip().upper(), "filings": filing_index.filings(symbol.strip().upper(), form)}
+    return filing_index.stats()
+
+
+@app.post("/api/py/filing_index")
+async def load_filing_index(request: FilingIndexRequest):
+    """Load the filings of many symbols into the filing index, only fetching what is new since each symbol's last load."""
+    symbols = list(dict.fromkeys(symbol.strip().upper() for symbol in request.symbols if symbol.strip()))
+    if not symbols:
+        raise HTTPException(status_code=400, detail="At least one symbol is required.")
+    try:
+        added = await asyncio.gather(*[
+            run_upstream("finnhub", get_finnhub_utils().sync_filings, symbol, request.form, request.from_date)
+            for symbol in symbols
+        ])
+        return {"form": request.form, "added": dict(zip(symbols, added))}
+    except UpstreamTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except UpstreamRateLimitError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+class WatchlistRequest(BaseModel):
+    symbols: List[str]
+
+@app.get("/api/py/watchlist")
+async def get_watchlist():
+    """Symbols kept warm in the cache, with the state (fresh / stale / missing) of each of their responses."""
+    return get_finnhub_utils().watchlist_status()
+
+
+@app.post("/api/py/watchlist")
+async def add_to_watchlist(request: WatchlistRequest):
+    """Start keeping the profile, quote, basic financials and latest 10-K filing of these symbols warm."""
+    symbols = [symbol.strip().upper() for symbol in request.symbols if symbol.strip()]
+    if not symbols:
+        raise HTTPException(status_code=400, detail="At least one symbol is required.")
+    get_finnhub_utils().refresher.watch(symbols)
+    return {"symbols": sorted(get_finnhub_utils().refresher.symbols)}
+
+
+@app.delete("/api/py/watchlist")
+async def remove_from_watchlist(symbol: str):
+    """Stop prefetching a symbol, its cached responses expire as usual."""
+    get_finnhub_utils().refresher.unwatch([symbol.strip().upper()])
+    return {"symbols": sorted(get_finnhub_utils().refresher.symbols)}
+
+
+@app.get("/api/py/rate_limits")
+async def get_rate_limits():
+    """Queue depth, wait times and throttling counters of the upstream rate limiters."""
+    return {"finnhub": get_finnhub_rate_limiter().stats(), "sec_api": get_sec_api_rate_limiter().stats()}
+
+
+@app.get("/api/py/http_sessions")
+async def get_http_sessions():
+    """Pool size, timeouts and connection reuse of the shared upstream HTTP sessions."""
+    return http_session_stats()
+
+
+def numeric_stats(stats: dict, *labels: str) -> dict:
+    return {(*labels, name): value for name, value in stats.items() if isinstance(value, (int, float))}
+
+def cache_gauges() -> dict:
+    gauges = {}
+    if get_finnhub_utils.cache_info().currsize:
+        gauges.update(numeric_stats(get_finnhub_utils().cache_stats(), "finnhub"))
+    if get_statement_cache.cache_info().currsize:
+        gauges.update(numeric_stats(get_statement_cache().stats(), "yfinance"))
+    return gauges
+
+def cache_refresh_gauges() -> dict:
+    if not get_finnhub_utils.cache_info().currsize:
+        return {}
+    return numeric_stats(get_finnhub_utils().refresher.stats())
+
+def rate_limiter_gauges() -> dict:
+    gauges = {}
+    for upstream, get_rate_limiter in [("finnhub", get_finnhub_rate_limiter), ("sec_api", get_sec_api_rate_limiter)]:
+        if get_rate_limiter.cache_info().currsize:
+            gauges.update(numeric_stats(get_rate_limiter().stats(), upstream))
+    return gauges
+
+def single_flight_gauges() -> dict:
+    if not get_upstream_executor.cache_info().currsize:
+        return {}
+    return numeric_stats(get_upstream_executor().single_flight.stats())
+
+def http_session_gauges() -> dict:
+    gauges = {}
+    for upstream, stats in http_session_stats().items():
+        gauges.update(numeric_stats(stats, upstream))
+    return gauges
+
+registry.register(GaugeCallback("cache_stat", "Response cache counters (size, hits, stale hits, misses, evictions).", ("cache", "stat"), cache_gauges))
+registry.register(GaugeCallback("cache_refresh_stat", "Background refreshes of stale and watched cache entries.", ("stat",), cache_refresh_gauges))
+registry.register(GaugeCallback("rate_limiter_stat", "Upstream rate limiter queue depth, waits and throttling.", ("upstream", "stat"), rate_limiter_gauges))
+registry.register(GaugeCallback("single_flight_stat", "Coalescing of identical concurrent upstream calls.", ("stat",), single_flight_gauges))
+registry.register(GaugeCallback("http_session_stat", "Requests, connections opened and reuse of the shared upstream HTTP sessions.", ("upstream", "stat"), http_session_gauges))
+
+@app.get("/metrics", include_in_schema=False)
+@app.get("/api/py/metrics")
+async def get_metrics():
+    """Prometheus metrics: upstream call latency and errors, request latency, response sizes and event loop lag."""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 
 class CompanyProfileResponse(BaseModel):
     symbol: str
@@ -79,14 +501,19 @@ async def get_company_profile(symbol: str):
     """Retrieve and format a detailed profile of a company using its stock ticker symbol."""
     if not symbol:
         raise HTTPException(status_code=400, detail="Symbol parameter is required.")
+    symbol = symbol.strip().upper()
     
     try:
-        profile = finnhub_utils.get_company_profile(symbol)
+        profile = await run_upstream("finnhub", get_finnhub_utils().get_company_profile, symbol)
         return {
             "symbol": symbol,
             "company_profile": profile
             }
         
+    except UpstreamTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except UpstreamRateLimitError as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -94,17 +521,28 @@ async def get_company_profile(symbol: str):
 class CompanyNewsResponse(BaseModel):
     symbol: str
     news: List[dict]
+    next_cursor: Optional[str] = None
 
 @app.get("/api/py/get_company_news", response_model=CompanyNewsResponse)
-async def get_company_news(symbol: str, start_date: Optional[str] = None, end_date: Optional[str] = None, max_news_num: Optional[int] = 10):
-    """Fetch recent news articles about a company based on its stock ticker, within a specified date range."""
+async def get_company_news(symbol: str, start_date: Optional[str] = None, end_date: Optional[str] = None, max_news_num: Optional[int] = 10, cursor: Optional[str] = None):
+    """Fetch recent news articles about a company based on its stock ticker, within a specified date range.
+    Pass the returned next_cursor back as cursor to page through older news."""
     
     if not symbol:
         raise HTTPException(status_code=400, detail="Symbol parameter is required.")
+    symbol = symbol.strip().upper()
     
     try:
-        news = finnhub_utils.get_company_news(symbol, start_date, end_date, max_news_num)
-        return {"symbol": symbol, "news": news}
+        page = await run_upstream(
+            "finnhub", get_finnhub_utils().get_company_news_page, symbol, start_date, end_date, 10 if max_news_num is None else max_news_num, cursor
+        )
+        return {"symbol": symbol, **page}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UpstreamTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except UpstreamRateLimitError as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
@@ -122,10 +560,15 @@ async def get_basic_financials_history(symbol: str, freq: str, start_date: Optio
 
     if not symbol or not freq:
         raise HTTPException(status_code=400, detail="Symbol and freq parameters are required.")
+    symbol = symbol.strip().upper()
     
     try:
-        financials = finnhub_utils.get_basic_financials_history(symbol, freq, start_date, end_date, selected_columns)
-        return {"symbol": symbol, "financials": financials.to_dict(orient='index')}
+        financials = await run_upstream("finnhub", get_finnhub_utils().get_basic_financials_history, symbol, freq, start_date, end_date, selected_columns)
+        return FastJSONResponse({"symbol": symbol, "financials": financials})
+    except UpstreamTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except UpstreamRateLimitError as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -142,14 +585,88 @@ async def get_basic_financials(symbol: str, selected_columns: Optional[List[str]
 
     if not symbol:
         raise HTTPException(status_code=400, detail="Symbol parameter is required.")
+    symbol = symbol.strip().upper()
     
     try:
-        financials = finnhub_utils.get_basic_financials(symbol, selected_columns)
-        return {"symbol": symbol, "financials": json.loads(financials)}
+        financials = await run_upstream("finnhub", get_finnhub_utils().get_basic_financials, symbol, selected_columns)
+        return FastJSONResponse({"symbol": symbol, "financials": financials})
+    except UpstreamTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except UpstreamRateLimitError as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+PEER_COMPARISON_MAX_SYMBOLS = 500
+
+def peer_fetch_budget() -> int:
+    """Number of uncached symbols a peer comparison fetches itself: the Finnhub calls the rate limiter
+    can grant within half the call timeout, so they complete in time and leave room for other requests."""
+    rate_limiter = get_finnhub_rate_limiter()
+    timeout = get_upstream_executor().timeouts["finnhub"]
+    return max(1, int(rate_limiter.available() + rate_limiter.rate * timeout / 2))
+
+class PeerComparisonResponse(BaseModel):
+    symbols: List[str]
+    metrics: List[str]
+    values: list
+    ranks: list
+    percentiles: list
+    zscores: list
+    count: list
+    median: list
+    mean: list
+    std: list
+    errors: dict
+
+@app.get("/api/py/get_peer_comparison", response_model=PeerComparisonResponse)
+async def get_peer_comparison(symbol: Optional[str] = None, symbols: Optional[str] = None, selected_columns: Optional[str] = None):
+    """Compare the latest basic financials of companies, e.g. symbols=AAPL,MSFT,GOOGL or symbol=AAPL for AAPL and its
+        industry peers. values, ranks (1 for the highest), percentiles and zscores are symbols x metrics tables, with null
+        where a company has no value; count, median, mean and std are per metric. A symbol that fails is reported in errors.
+        Cached symbols are always compared; beyond what the Finnhub quota allows, uncached ones are loaded in the
+        background and reported in errors, to be compared on a later call."""
+    symbol_list = comma_list(symbols)
+    if not symbol_list and not symbol:
+        raise HTTPException(status_code=400, detail="Symbol or symbols parameter is required.")
+
+    try:
+        if not symbol_list:
+            symbol_list = await run_upstream("finnhub", get_finnhub_utils().get_company_peers, symbol.strip().upper())
+        symbol_list = list(dict.fromkeys(symbol_list))
+        if len(symbol_list) > PEER_COMPARISON_MAX_SYMBOLS:
+            raise ValueError(f"At most {PEER_COMPARISON_MAX_SYMBOLS} symbols per request.")
+
+        # Fetch the uncached symbols the quota allows concurrently, defer the others to the background refresher;
+        # the comparison then only reads the cache
+        finnhub_utils = get_finnhub_utils()
+        uncached = [s for s in symbol_list if not finnhub_utils.is_basic_financials_cached(s)]
+        budget = peer_fetch_budget()
+        fetched, deferred = uncached[:budget], uncached[budget:]
+        for s in deferred:
+            finnhub_utils.prefetch_basic_financials(s)
+        results = await asyncio.gather(
+            *[run_upstream_bulk("finnhub", finnhub_utils.get_basic_financials_table, s) for s in fetched],
+            return_exceptions=True,
+        )
+        errors = {s: str(result) for s, result in zip(fetched, results) if isinstance(result, Exception)}
+        errors.update({s: "Basic financials are not cached yet and are being loaded, try again later." for s in deferred})
+        compared = [s for s in symbol_list if s not in errors]
+        comparison = await asyncio.to_thread(
+            finnhub_utils.get_peer_comparison, compared, comma_list(selected_columns, upper=False)
+        )
+        errors.update({s: "No basic financials found." for s in compared if s not in comparison["symbols"]})
+        return FastJSONResponse({**comparison, "errors": errors})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except UpstreamTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except UpstreamRateLimitError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 
 class SecFilingResponse(BaseModel):
     symbol: str
@@ -161,14 +678,103 @@ async def get_sec_filing(symbol: str, form: Optional[str] = "10-K", from_date: O
 
     if not symbol:
         raise HTTPException(status_code=400, detail="Symbol parameter is required.")
+    symbol = symbol.strip().upper()
     
     try:
-        filing = finnhub_utils.get_sec_filing(symbol, form, from_date, to_date)
+        filing = await run_upstream("finnhub", get_finnhub_utils().get_sec_filing, symbol, form, from_date, to_date)
         return {"symbol": symbol, "filing": filing}
+    except UpstreamTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except UpstreamRateLimitError as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
 
+BATCH_MAX_OPERATIONS = 100
+
+# Tools that can be called through /api/py/batch, by name
+BATCH_TOOLS = {
+    "get_income_statement": get_income_statement,
+    "get_financial_statements": get_financial_statements,
+    "get_10k_section": get_10k_section,
+    "get_10k_sections": get_10k_sections,
+    "search_10k_passages": search_10k_passages,
+    "get_company_profile": get_company_profile,
+    "get_company_news": get_company_news,
+    "get_basic_financials_history": get_basic_financials_history,
+    "get_basic_financials": get_basic_financials,
+    "get_peer_comparison": get_peer_comparison,
+    "get_sec_filing": get_sec_filing,
+}
+
+class BatchOperation(BaseModel):
+    tool: str
+    args: dict = {}
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation]
+
+class BatchItemResult(BaseModel):
+    tool: str
+    ok: bool
+    result: Optional[dict] = None
+    status_code: Optional[int] = None
+    error: Optional[str] = None
+
+class BatchResponse(BaseModel):
+    results: List[BatchItemResult]
+
+def comma_joined(value: Any) -> Any:
+    # A comma-separated parameter (symbols, sections...) may be given as a JSON list in batch args
+    if isinstance(value, (list, tuple)) and all(isinstance(item, str) for item in value):
+        return ",".join(value)
+    return value
+
+@lru_cache(maxsize=None)
+def batch_args_model(tool: str) -> Type[BaseModel]:
+    """Pydantic model of the arguments of a batch tool, built from its handler signature,
+    so batch args are validated and coerced like the query parameters of the endpoint."""
+    fields = {}
+    for name, parameter in inspect.signature(BATCH_TOOLS[tool]).parameters.items():
+        annotation = parameter.annotation
+        if annotation in (str, Optional[str]):
+            annotation = Annotated[annotation, BeforeValidator(comma_joined)]
+        fields[name] = (annotation, ... if parameter.default is inspect.Parameter.empty else parameter.default)
+    return create_model(f"{tool}_args", __config__=ConfigDict(extra="forbid"), **fields)
+
+async def run_batch_operation(operation: BatchOperation) -> dict:
+    """Run one batch operation, turning any failure into a per-item error."""
+    if operation.tool not in BATCH_TOOLS:
+        return {"tool": operation.tool, "ok": False, "status_code": 400, "error": f"Unknown tool {operation.tool}."}
+    try:
+        args = batch_args_model(operation.tool).model_validate(operation.args)
+    except ValidationError as e:
+        errors = "; ".join(f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.errors())
+        return {"tool": operation.tool, "ok": False, "status_code": 400, "error": f"Invalid arguments: {errors}"}
+    try:
+        result = await BATCH_TOOLS[operation.tool](**dict(args))
+        if isinstance(result, FastJSONResponse):
+            result = result.payload
+        return {"tool": operation.tool, "ok": True, "result": result}
+    except HTTPException as e:
+        return {"tool": operation.tool, "ok": False, "status_code": e.status_code, "error": str(e.detail)}
+    except Exception as e:
+        return {"tool": operation.tool, "ok": False, "status_code": 500, "error": str(e)}
+
+@app.post("/api/py/batch", response_model=BatchResponse)
+async def batch(request: BatchRequest):
+    """Run several tool calls (e.g. profiles and basic financials for many symbols) concurrently in one request.
+        Results are returned in request order; a failing operation only fails its own item."""
+    if not request.operations:
+        raise HTTPException(status_code=400, detail="At least one operation is required.")
+    if len(request.operations) > BATCH_MAX_OPERATIONS:
+        raise HTTPException(status_code=400, detail=f"A batch is limited to {BATCH_MAX_OPERATIONS} operations.")
+
+    results = await asyncio.gather(*[run_batch_operation(operation) for operation in request.operations])
+    return FastJSONResponse({"results": results})
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000, reload=True)
@@ -0,0 +1,120 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Annotated, Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """Thread-safe in-memory cache with per-entry TTL and LRU eviction once max_size is reached.
+
+    An entry may also be given a stale grace period after its TTL: get_or_set still serves
+    it during that period, and asks the caller to refresh it in the background
+    (stale-while-revalidate).
+    """
+
+    def __init__(self, max_size: Annotated[int, "maximum number of entries kept in memory"] = 1024):
+        self.max_size = max_size
+        # key -> (expires_at, stale_until, value)
+        self.entries: "OrderedDict[Hashable, Tuple[float, float, Any]]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def lookup(self, key: Hashable) -> Tuple[Optional[str], Any]:
+        """Return ("fresh" | "stale" | None, value) for key, dropping it if past its stale grace period.
+        Call with self.lock held."""
+        entry = self.entries.get(key)
+        if entry is None:
+            return None, None
+        now = time.monotonic()
+        if entry[1] < now:
+            del self.entries[key]
+            return None, None
+        self.entries.move_to_end(key)
+        return ("fresh" if entry[0] >= now else "stale"), entry[2]
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key, or default if it is missing or expired."""
+        with self.lock:
+            state, value = self.lookup(key)
+            if state != "fresh":
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl: Annotated[float, "time to live in seconds"],
+        stale_ttl: Annotated[float, "seconds after ttl during which the value may still be served stale"] = 0,
+    ) -> None:
+        if self.max_size <= 0 or ttl <= 0:
+            return
+        now = time.monotonic()
+        with self.lock:
+            self.entries[key] = (now + ttl, now + ttl + max(0, stale_ttl), value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_set(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        ttl: float,
+        stale_ttl: float = 0,
+        revalidate: Annotated[Optional[Callable[[], Any]], "called when a stale value is served, to refresh it"] = None,
+    ) -> Any:
+        """Return the cached value for key, calling loader() and caching its result on a miss.
+        With revalidate, a stale value is returned as is and revalidate() is called to refresh it."""
+        with self.lock:
+            state, value = self.lookup(key)
+            if state == "fresh":
+                self.hits += 1
+                return value
+            serve_stale = state == "stale" and revalidate is not None
+            if serve_stale:
+                self.stale_hits += 1
+            else:
+                self.misses += 1
+        if serve_stale:
+            revalidate()
+            return value
+        value = loader()
+        self.set(key, value, ttl, stale_ttl)
+        return value
+
+    def expires_in(self, key: Hashable) -> Optional[float]:
+        """Seconds until the entry for key turns stale (negative once stale), None if it is not cached.
+        Does not count as a lookup."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[1] < time.monotonic():
+                return None
+            return entry[0] - time.monotonic()
+
+    def invalidate(self, predicate: Optional[Callable[[Hashable], bool]] = None) -> int:
+        """Drop every entry whose key matches predicate (all entries if None). Returns the number removed."""
+        with self.lock:
+            keys = [key for key in self.entries if predicate is None or predicate(key)]
+            for key in keys:
+                del self.entries[key]
+            return len(keys)
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "size": len(self.entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round((self.hits + self.stale_hits) / lookups, 4) if lookups else 0.0,
+            }
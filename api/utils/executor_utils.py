@@ -0,0 +1,214 @@
+import os
+import time
+import heapq
+import asyncio
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Annotated, Any, Callable, Dict, Hashable, List, Optional
+from utils.singleflight_utils import SingleFlight
+from utils.other_utils import load_env
+
+
+DEFAULT_MAX_WORKERS = 32
+
+# Per-upstream (max concurrent calls, timeout in seconds). Override with
+# <UPSTREAM>_MAX_CONCURRENCY / <UPSTREAM>_TIMEOUT in .env, e.g. SEC_API_TIMEOUT=90
+UPSTREAM_DEFAULTS = {
+    "finnhub": (16, 15.0),
+    "yfinance": (8, 30.0),
+    "sec_api": (4, 60.0),
+}
+
+
+# Admission priorities of upstream calls: single lookups go before the calls of bulk fan-outs
+INTERACTIVE_PRIORITY = 0
+BULK_PRIORITY = 1
+
+
+class UpstreamTimeoutError(Exception):
+    """Raised when an upstream call does not complete within its configured timeout."""
+
+
+# Deadline (time.monotonic()) of the upstream call running on the current pool thread
+call_state = threading.local()
+
+def current_deadline() -> Optional[float]:
+    """Deadline of the upstream call running on this thread, None outside the executor.
+    Blocking waits inside the call (e.g. for a rate limiter token) should give up at this time."""
+    return getattr(call_state, "deadline", None)
+
+
+class PrioritySemaphore:
+    """asyncio semaphore admitting waiters by priority (lower values first), first come first served within a priority."""
+
+    def __init__(self, value: int):
+        self.value = value
+        self.waiters: List[tuple] = []
+        self.sequence = itertools.count()
+
+    async def acquire(self, priority: int = INTERACTIVE_PRIORITY) -> None:
+        if self.value > 0 and not self.waiters:
+            self.value -= 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self.sequence), future)
+        heapq.heappush(self.waiters, entry)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just before the cancellation, pass it on
+                self.release()
+            else:
+                self.waiters.remove(entry)
+                heapq.heapify(self.waiters)
+            raise
+
+    def release(self) -> None:
+        while self.waiters:
+            _, _, future = heapq.heappop(self.waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.value += 1
+
+    def queued(self) -> int:
+        return len(self.waiters)
+
+
+class UpstreamExecutor:
+    """Run blocking upstream clients (finnhub, yfinance, sec_api) off the event loop.
+
+    All calls share one bounded thread pool; each upstream additionally gets its own
+    concurrency limit and timeout so a slow SEC extraction cannot starve Finnhub lookups.
+    A call holds its upstream's slot until its thread finishes, even after a timeout, so
+    an upstream never occupies more pool threads than its limit.
+    Identical concurrent calls (same function and arguments) share a single upstream call.
+    Calls waiting for the concurrency limit are admitted by priority, so a single lookup
+    does not queue behind every call of a bulk request. A call that times out is abandoned:
+    its thread sees the deadline through current_deadline() and stops waiting for the upstream.
+    """
+
+    def __init__(self, max_workers: Annotated[Optional[int], "size of the shared thread pool"] = None):
+        load_env()
+        self.max_workers = max_workers or int(os.environ.get("UPSTREAM_MAX_WORKERS", DEFAULT_MAX_WORKERS))
+        self.thread_pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="upstream")
+        self.limits: Dict[str, int] = {}
+        self.timeouts: Dict[str, float] = {}
+        self.semaphores: Dict[str, PrioritySemaphore] = {}
+        self.single_flight = SingleFlight()
+        for upstream, (max_concurrency, timeout) in UPSTREAM_DEFAULTS.items():
+            self.configure(upstream, max_concurrency, timeout)
+
+    def configure(
+        self,
+        upstream: Annotated[str, "upstream name, e.g. 'finnhub'"],
+        max_concurrency: Annotated[int, "maximum number of calls in flight for this upstream"],
+        timeout: Annotated[float, "timeout in seconds for a single call"],
+    ) -> None:
+        """Set the concurrency limit and timeout of an upstream, reading .env overrides first."""
+        prefix = upstream.upper()
+        self.limits[upstream] = int(os.environ.get(f"{prefix}_MAX_CONCURRENCY", max_concurrency))
+        self.timeouts[upstream] = float(os.environ.get(f"{prefix}_TIMEOUT", timeout))
+        self.semaphores[upstream] = PrioritySemaphore(self.limits[upstream])
+
+    async def run(
+        self,
+        upstream: Annotated[str, "upstream name, e.g. 'finnhub'"],
+        func: Annotated[Callable[..., Any], "blocking function performing the upstream call"],
+        *args: Any,
+        **kwargs: Any,
+    ) -> Any:
+        """Run func(*args, **kwargs) in the thread pool, honouring the upstream's limit and timeout.
+
+        Concurrent calls with the same function and arguments are coalesced into one.
+        """
+        return await self.run_with_priority(INTERACTIVE_PRIORITY, upstream, func, *args, **kwargs)
+
+    async def run_with_priority(
+        self,
+        priority: Annotated[int, "admission priority, lower values first"],
+        upstream: Annotated[str, "upstream name, e.g. 'finnhub'"],
+        func: Annotated[Callable[..., Any], "blocking function performing the upstream call"],
+        *args: Any,
+        **kwargs: Any,
+    ) -> Any:
+        key = self.call_key(upstream, func, args, kwargs)
+        return await self.single_flight.do(key, lambda: self.run_uncoalesced(priority, upstream, func, *args, **kwargs))
+
+    @staticmethod
+    def call_key(upstream: str, func: Callable[..., Any], args: tuple, kwargs: dict) -> Hashable:
+        freeze = lambda v: tuple(v) if isinstance(v, list) else v
+        return (
+            upstream,
+            getattr(func, "__qualname__", repr(func)),
+            tuple(map(freeze, args)),
+            tuple(sorted((k, freeze(v)) for k, v in kwargs.items())),
+        )
+
+    async def run_uncoalesced(self, priority: int, upstream: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        if upstream not in self.semaphores:
+            self.configure(upstream, self.max_workers, UPSTREAM_DEFAULTS["finnhub"][1])
+
+        loop = asyncio.get_running_loop()
+        semaphore = self.semaphores[upstream]
+        await semaphore.acquire(priority)
+        timeout = self.timeouts[upstream]
+        try:
+            thread_future = self.thread_pool.submit(run_until, time.monotonic() + timeout, func, args, kwargs)
+        except BaseException:
+            semaphore.release()
+            raise
+        # The slot is freed when the thread is done, not when the caller gives up: an abandoned call
+        # keeps counting against its upstream's limit, so a hung upstream cannot fill the shared pool
+        thread_future.add_done_callback(lambda _: release_from_thread(loop, semaphore))
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(thread_future), timeout=timeout)
+        except asyncio.TimeoutError:
+            raise UpstreamTimeoutError(
+                f"{upstream} call {getattr(func, '__name__', func)} timed out after {timeout}s"
+            )
+
+    def queued(self) -> Dict[str, int]:
+        """Number of calls waiting for the concurrency limit, per upstream."""
+        return {upstream: semaphore.queued() for upstream, semaphore in self.semaphores.items()}
+
+    def shutdown(self) -> None:
+        self.thread_pool.shutdown(wait=False, cancel_futures=True)
+
+
+def release_from_thread(loop: asyncio.AbstractEventLoop, semaphore: PrioritySemaphore) -> None:
+    try:
+        loop.call_soon_threadsafe(semaphore.release)
+    except RuntimeError:
+        # The event loop is closed, nobody waits for the slot anymore
+        pass
+
+
+def run_until(deadline: float, func: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+    """Run func on a pool thread with current_deadline() set, unless the caller already gave up."""
+    if time.monotonic() >= deadline:
+        raise UpstreamTimeoutError(f"{getattr(func, '__name__', func)} was abandoned before it started")
+    call_state.deadline = deadline
+    try:
+        return func(*args, **kwargs)
+    finally:
+        call_state.deadline = None
+
+
+@lru_cache(maxsize=None)
+def get_upstream_executor() -> UpstreamExecutor:
+    """Process-wide UpstreamExecutor, created on first use."""
+    return UpstreamExecutor()
+
+
+async def run_upstream(upstream: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """Shortcut for get_upstream_executor().run, used by the API handlers."""
+    return await get_upstream_executor().run(upstream, func, *args, **kwargs)
+
+
+async def run_upstream_bulk(upstream: str, func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """run_upstream for the calls of a bulk fan-out, admitted after waiting single lookups."""
+    return await get_upstream_executor().run_with_priority(BULK_PRIORITY, upstream, func, *args, **kwargs)
@@ -0,0 +1,133 @@
+import os
+import json
+import time
+import sqlite3
+import tempfile
+from functools import lru_cache
+from typing import Annotated, List, Optional, Tuple
+from utils.sqlite_utils import create_database, thread_connection
+
+
+DEFAULT_INDEX_PATH = os.path.join(tempfile.gettempdir(), "ai-agent-cache", "sec_filings.sqlite3")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS filings (
+    symbol TEXT NOT NULL,
+    form TEXT NOT NULL,
+    year TEXT NOT NULL,
+    filed_date TEXT NOT NULL,
+    report_url TEXT NOT NULL,
+    filing TEXT NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (symbol, form, year)
+);
+CREATE TABLE IF NOT EXISTS synced_ranges (
+    symbol TEXT NOT NULL,
+    form TEXT NOT NULL,
+    from_date TEXT NOT NULL,
+    to_date TEXT NOT NULL,
+    synced_at REAL NOT NULL,
+    PRIMARY KEY (symbol, form, from_date, to_date)
+);
+CREATE INDEX IF NOT EXISTS filings_report_url ON filings (report_url);
+"""
+
+
+class FilingIndex:
+    """Durable SQLite index of SEC filings, keyed by symbol, form and year, filled from Finnhub filings results.
+
+    The year is the one the filing was filed in, as used by the fyear parameter of the 10-K
+    endpoints, and only the most recently filed report of each year is kept. The index also
+    remembers which date ranges were fully fetched, so a year with no filing is answered
+    locally too, and a refresh only needs to fetch the days since the last sync.
+    """
+
+    def __init__(self, path: Annotated[Optional[str], "path of the SQLite database file"] = None):
+        self.path = path or os.environ.get("SEC_FILING_INDEX_PATH", DEFAULT_INDEX_PATH)
+        create_database(self.path, SCHEMA)
+
+    def connection(self) -> sqlite3.Connection:
+        """Return this thread's connection to the index, opening it on first use."""
+        return thread_connection(self.path)
+
+    def add(
+        self,
+        symbol: Annotated[str, "ticker symbol the filings were queried for"],
+        form: Annotated[str, "form type the filings were queried for"],
+        filings: Annotated[List[dict], "Finnhub filings results"],
+        from_date: Annotated[Optional[str], "start of the queried range, yyyy-mm-dd, to record it as synced"] = None,
+        to_date: Annotated[Optional[str], "end of the queried range, yyyy-mm-dd, to record it as synced"] = None,
+    ) -> int:
+        """Index filings, keeping the latest one of each (form, year). Returns the number of rows inserted or updated."""
+        now = time.time()
+        rows = [
+            (symbol, f["form"], f["filedDate"][:4], f["filedDate"], f["reportUrl"], json.dumps(f), now)
+            for f in filings
+            if f.get("form") and f.get("filedDate") and f.get("reportUrl")
+        ]
+        with self.connection() as conn:
+            changed = conn.total_changes
+            conn.executemany(
+                "INSERT INTO filings (symbol, form, year, filed_date, report_url, filing, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (symbol, form, year) DO UPDATE SET filed_date = excluded.filed_date, report_url = excluded.report_url, "
+                "filing = excluded.filing, updated_at = excluded.updated_at WHERE excluded.filed_date > filings.filed_date",
+                rows,
+            )
+            changed = conn.total_changes - changed
+            if from_date and to_date:
+                # Ranges within the new one are redundant, e.g. the previous range extended by an incremental sync
+                conn.execute(
+                    "DELETE FROM synced_ranges WHERE symbol = ? AND form = ? AND from_date >= ? AND to_date <= ?",
+                    (symbol, form, from_date, to_date),
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO synced_ranges (symbol, form, from_date, to_date, synced_at) VALUES (?, ?, ?, ?, ?)",
+                    (symbol, form, from_date, to_date, now),
+                )
+        return changed
+
+    def get(self, symbol: str, form: str, year: str) -> Optional[dict]:
+        """The latest filing of a symbol filed in year, or None if none is indexed."""
+        row = self.connection().execute(
+            "SELECT filing FROM filings WHERE symbol = ? AND form = ? AND year = ?", (symbol, form, str(year))
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def find_by_url(self, report_url: str) -> Optional[dict]:
+        """The indexed filing with this report url, or None."""
+        row = self.connection().execute("SELECT filing FROM filings WHERE report_url = ? LIMIT 1", (report_url,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def filings(self, symbol: str, form: Optional[str] = None) -> List[dict]:
+        """Every indexed filing of a symbol, latest first."""
+        rows = self.connection().execute(
+            "SELECT filing FROM filings WHERE symbol = ? AND (? IS NULL OR form = ?) ORDER BY filed_date DESC", (symbol, form, form)
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def is_synced(self, symbol: str, form: str, from_date: str, to_date: str) -> bool:
+        """Whether a single fetched range covers [from_date, to_date], so the index holds every filing in it."""
+        row = self.connection().execute(
+            "SELECT 1 FROM synced_ranges WHERE symbol = ? AND form = ? AND from_date <= ? AND to_date >= ? LIMIT 1",
+            (symbol, form, from_date, to_date),
+        ).fetchone()
+        return row is not None
+
+    def latest_synced_range(self, symbol: str, form: str) -> Optional[Tuple[str, str]]:
+        """(from_date, to_date) of the fetched range of a symbol and form that ends last, None if it was never synced."""
+        return self.connection().execute(
+            "SELECT from_date, to_date FROM synced_ranges WHERE symbol = ? AND form = ? ORDER BY to_date DESC, from_date LIMIT 1",
+            (symbol, form),
+        ).fetchone()
+
+    def stats(self) -> dict:
+        conn = self.connection()
+        filings, symbols = conn.execute("SELECT COUNT(*), COUNT(DISTINCT symbol) FROM filings").fetchone()
+        ranges = conn.execute("SELECT COUNT(*) FROM synced_ranges").fetchone()[0]
+        return {"path": self.path, "filings": filings, "symbols": symbols, "synced_ranges": ranges}
+
+
+@lru_cache(maxsize=None)
+def get_filing_index() -> FilingIndex:
+    """Process-wide FilingIndex, opened on first use."""
+    return FilingIndex()
@@ -0,0 +1,79 @@
+from bisect import bisect_left, bisect_right
+from typing import Annotated, Dict, List, Optional, Tuple
+
+
+class BasicFinancialsTable:
+    """Columnar view of one Finnhub company_basic_financials payload.
+
+    Every series is stored as metric -> (sorted periods, values), so both the latest
+    snapshot and date-range slices are answered locally with a binary search, without
+    fetching the payload again.
+    """
+
+    def __init__(self, symbol: Annotated[str, "ticker symbol"], payload: Annotated[dict, "raw company_basic_financials response"]):
+        self.symbol = symbol
+        self.metric: Dict[str, object] = dict(payload.get("metric") or {})
+        self.series: Dict[str, Dict[str, Tuple[List[str], List[float]]]] = {}
+        for freq, metrics in (payload.get("series") or {}).items():
+            columns = {}
+            for metric, value_list in metrics.items():
+                points = sorted((value["period"], value["v"]) for value in value_list)
+                columns[metric] = ([period for period, _ in points], [v for _, v in points])
+            self.series[freq] = columns
+        self.latest_row: Optional[tuple] = None
+
+    def has_series(self) -> bool:
+        return any(self.series.values())
+
+    def latest(
+        self,
+        selected_columns: Annotated[Optional[List[str]], "metrics to keep, all if None"] = None,
+        freq: Annotated[str, "series whose latest values override the snapshot metrics"] = "quarterly",
+    ) -> dict:
+        """Snapshot metrics, updated with the most recent value of every series of the given frequency."""
+        output_dict = dict(self.metric)
+        for metric, (periods, values) in self.series.get(freq, {}).items():
+            if values:
+                output_dict[metric] = values[-1]
+        if selected_columns:
+            output_dict = {k: v for k, v in output_dict.items() if k in selected_columns}
+        return output_dict
+
+    def latest_numeric(self) -> tuple:
+        """(metric ids, values) arrays of the numeric metrics of latest(), see peer_utils.numeric_row. Built once per table."""
+        if self.latest_row is None:
+            from utils.peer_utils import numeric_row
+            self.latest_row = numeric_row(self.latest())
+        return self.latest_row
+
+    def history(
+        self,
+        freq: Annotated[str, "reporting frequency: annual / quarterly"],
+        start_date: Annotated[str, "first period to include, yyyy-mm-dd"],
+        end_date: Annotated[str, "last period to include, yyyy-mm-dd"],
+        selected_columns: Annotated[Optional[List[str]], "metrics to keep, all if None"] = None,
+    ) -> Dict[str, Dict[str, float]]:
+        """Values of each metric for the periods between start_date and end_date, as {metric: {period: value}}."""
+        output_dict = {}
+        columns = self.series.get(freq, {})
+        metrics = [m for m in selected_columns if m in columns] if selected_columns else list(columns)
+        for metric in metrics:
+            periods, values = columns[metric]
+            lo = bisect_left(periods, start_date)
+            hi = bisect_right(periods, end_date)
+            if lo < hi:
+                output_dict[metric] = dict(zip(periods[lo:hi], values[lo:hi]))
+        return output_dict
+
+    def history_by_date(
+        self,
+        freq: Annotated[str, "reporting frequency: annual / quarterly"],
+        start_date: Annotated[str, "first period to include, yyyy-mm-dd"],
+        end_date: Annotated[str, "last period to include, yyyy-mm-dd"],
+        selected_columns: Annotated[Optional[List[str]], "metrics to keep, all if None"] = None,
+    ) -> Dict[str, Dict[str, Optional[float]]]:
+        """Same data as history, laid out as {period: {metric: value}} in date order.
+        Every period lists every returned metric, with None where a metric has no value."""
+        by_metric = self.history(freq, start_date, end_date, selected_columns)
+        periods = sorted({period for values in by_metric.values() for period in values})
+        return {period: {metric: values.get(period) for metric, values in by_metric.items()} for period in periods}
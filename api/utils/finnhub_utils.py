@@ -1,38 +1,219 @@
 import os 
-import json
+import time
 from typing import Annotated
-import pandas as pd
-from datetime import datetime
-from collections import defaultdict
-import finnhub
-from dotenv import load_dotenv
+from datetime import datetime, timedelta
+from functools import lru_cache, partial
 import sys
-from utils.other_utils import today
-from typing import List, Optional
+from utils.other_utils import today, load_env
+from utils.cache_utils import TTLCache
+from utils.prefetch_utils import RefreshScheduler, WatchedCalls
+from utils.financials_utils import BasicFinancialsTable
+from utils.news_store import NewsStore, SymbolNews
+from utils.filing_index import get_filing_index
+from utils.ratelimit_utils import rate_limiter_from_env
+from utils.metrics_utils import timed_upstream
+from utils.http_utils import get_http_session
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-load_dotenv(".env")
+# Time to live (in seconds) of cached Finnhub responses, per endpoint
+CACHE_TTLS = {
+    "quote": 15,
+    "company_news": 15 * 60,
+    "company_profile2": 6 * 60 * 60,
+    "company_basic_financials": 24 * 60 * 60,
+    "company_peers": 24 * 60 * 60,
+    "filings": 24 * 60 * 60,
+}
+
+# Seconds after the TTL during which a cached response is still served while it is refreshed in the background
+STALE_TTLS = {
+    "quote": 60,
+    "company_profile2": 24 * 60 * 60,
+    "company_basic_financials": 24 * 60 * 60,
+    "company_peers": 24 * 60 * 60,
+    "filings": 24 * 60 * 60,
+}
+
+# Rate limiter priority of each endpoint: interactive lookups (0) go before bulk fetches (2)
+CALL_PRIORITIES = {
+    "quote": 0,
+    "company_profile2": 0,
+    "company_basic_financials": 1,
+    "company_peers": 1,
+    "company_news": 2,
+    "filings": 2,
+}
+
+# Background refreshes only use the quota left over by requests, and never the second half of the burst
+BACKGROUND_PRIORITY = 3
+
+@lru_cache(maxsize=None)
+def get_finnhub_rate_limiter():
+    """Rate limiter shared by every FinnhubUtils instance, Finnhub quotas are per API key."""
+    load_env()
+    return rate_limiter_from_env("finnhub", rate_per_minute=60, burst=10)
+
+def finnhub_throttle_delay(e: Exception) -> Optional[float]:
+    """Retry delay if e is a Finnhub 429/5xx answer, None for any other error."""
+    status_code = getattr(e, "status_code", None)
+    if status_code is None or (status_code != 429 and status_code < 500):
+        return None
+    retry_after = e.response.headers.get("Retry-After", "0")
+    return float(retry_after) if retry_after.isdigit() else 0.0
 
 ## FINNHUB API DOCUMENTATION: https://finnhub.io/docs/api
 class FinnhubUtils:
     def __init__(self):
+        load_env()
         self.finnhub_client = self.init_finnhub_client()
+        self.cache = TTLCache(max_size=int(os.environ.get("FINNHUB_CACHE_SIZE", 2048)))
+        self.news_store = NewsStore(
+            max_items=int(os.environ.get("NEWS_MAX_ITEMS_PER_SYMBOL", 1000)),
+            retention_days=int(os.environ.get("NEWS_RETENTION_DAYS", 90)),
+        )
+        self.refresher = RefreshScheduler(
+            self.cache.expires_in,
+            self.watched_calls,
+            interval=float(os.environ.get("WATCHLIST_REFRESH_SECONDS", 60)),
+            symbols=[s.strip().upper() for s in os.environ.get("WATCHLIST", "").split(",") if s.strip()],
+        )
         
     def init_finnhub_client(self):
         if os.environ.get("FINNHUB_API_KEY") is None:
             raise Exception("Missing FINNHUB_API_KEY in .env")
         else:
+            import finnhub
+            import requests
             finnhub_client = finnhub.Client(api_key=os.environ.get("FINNHUB_API_KEY"))
+            if isinstance(getattr(finnhub_client, "_session", None), requests.Session):
+                # Swap the client's own session for the shared keep-alive one, keeping its token and headers
+                pooled = get_http_session("finnhub")
+                pooled.session.headers.update(finnhub_client._session.headers)
+                pooled.session.params.update(finnhub_client._session.params)
+                pooled.session.proxies.update(finnhub_client._session.proxies)
+                finnhub_client._session.close()
+                finnhub_client._session = pooled.session
+                finnhub_client.DEFAULT_TIMEOUT = pooled.timeout
             return finnhub_client
 
+    def cache_key(self, endpoint: Annotated[str, "name of the finnhub.Client method"], *args: Any, **params: Any) -> tuple:
+        freeze = lambda v: tuple(v) if isinstance(v, list) else v
+        return (endpoint, *map(freeze, args), *sorted((k, freeze(v)) for k, v in params.items()))
+
+    def cached(self, endpoint: str, key: tuple, fetch: Callable[..., Any]) -> Any:
+        """Serve key from the cache, loading it with fetch() on a miss.
+        A stale entry is served as is and refreshed in the background with fetch(priority=BACKGROUND_PRIORITY)."""
+        revalidate = lambda: self.refresher.submit(key, lambda: self.refresh(endpoint, key, fetch))
+        return self.cache.get_or_set(key, fetch, CACHE_TTLS.get(endpoint, 0), STALE_TTLS.get(endpoint, 0), revalidate)
+
+    def refresh(self, endpoint: str, key: tuple, fetch: Callable[..., Any]) -> None:
+        self.cache.set(key, fetch(priority=BACKGROUND_PRIORITY), CACHE_TTLS.get(endpoint, 0), STALE_TTLS.get(endpoint, 0))
+
+    def finnhub_call(self, endpoint: Annotated[str, "name of the finnhub.Client method"], *args: Any, **params: Any) -> Tuple[tuple, Callable[..., Any]]:
+        """Cache key and fetch function of a finnhub.Client call."""
+        fetch = lambda priority=None: self.fetch_finnhub(endpoint, *args, priority=priority, **params)
+        return self.cache_key(endpoint, *args, **params), fetch
+
+    def basic_financials_call(self, symbol: Annotated[str, "ticker symbol"]) -> Tuple[tuple, Callable[..., Any]]:
+        """Cache key and fetch function of the BasicFinancialsTable of a symbol."""
+        fetch = lambda priority=None: BasicFinancialsTable(
+            symbol, self.fetch_finnhub("company_basic_financials", symbol, "all", priority=priority)
+        )
+        return ("company_basic_financials", symbol, "all"), fetch
+
+    def filings_call(self, **params: Any) -> Tuple[tuple, Callable[..., Any]]:
+        """Cache key and fetch function of a filings query. Fetched filings are also added to the filing index."""
+        key, fetch_filings = self.finnhub_call("filings", **params)
+
+        def fetch(priority=None):
+            filings = fetch_filings(priority=priority)
+            get_filing_index().add(params["symbol"], params["form"], filings, params["_from"], params["to"])
+            return filings
+
+        return key, fetch
+
+    def call_finnhub(self, endpoint: Annotated[str, "name of the finnhub.Client method"], *args: Any, **params: Any) -> Any:
+        """Call a finnhub.Client endpoint, serving repeated calls from the in-memory cache."""
+        key, fetch = self.finnhub_call(endpoint, *args, **params)
+        return self.cached(endpoint, key, fetch)
+
+    def fetch_finnhub(
+        self,
+        endpoint: Annotated[str, "name of the finnhub.Client method"],
+        *args: Any,
+        priority: Annotated[Optional[int], "rate limiter priority, default to the endpoint's"] = None,
+        **params: Any,
+    ) -> Any:
+        """Call a finnhub.Client endpoint, bypassing the cache but not the rate limiter."""
+        def call():
+            with timed_upstream("finnhub", endpoint):
+                return getattr(self.finnhub_client, endpoint)(*args, **params)
+
+        limiter = get_finnhub_rate_limiter()
+        if priority is None:
+            priority = CALL_PRIORITIES.get(endpoint, 1)
+        return limiter.call(
+            call,
+            priority=priority,
+            throttle_delay=finnhub_throttle_delay,
+            reserve=limiter.burst / 2 if priority >= BACKGROUND_PRIORITY else 0.0,
+        )
+
+    def get_basic_financials_table(self, symbol: Annotated[str, "ticker symbol"]) -> BasicFinancialsTable:
+        """Fetch all basic financials of a symbol once and keep them, in columnar form, in the cache.
+        Both the latest snapshot and historical slices are served from this table."""
+        key, fetch = self.basic_financials_call(symbol)
+        return self.cached("company_basic_financials", key, fetch)
+
+    def watched_calls(self, symbol: Annotated[str, "ticker symbol"]) -> WatchedCalls:
+        """Cache key and refresh function of every response kept warm for a watched symbol:
+        the responses behind get_company_profile, get_basic_financials(_history) and get_sec_filing."""
+        calls = {
+            "company_profile2": self.finnhub_call("company_profile2", symbol=symbol),
+            "quote": self.finnhub_call("quote", symbol=symbol),
+            "company_basic_financials": self.basic_financials_call(symbol),
+            "filings": self.filings_call(**self.sec_filing_params(symbol)),
+        }
+        return {endpoint: (key, partial(self.refresh, endpoint, key, fetch)) for endpoint, (key, fetch) in calls.items()}
+
+    def watchlist_status(self) -> dict:
+        """Watched symbols with the cache state of each of their responses: fresh, stale or missing."""
+        entries = {}
+        for symbol in sorted(self.refresher.symbols):
+            entries[symbol] = {}
+            for name, (key, _) in self.watched_calls(symbol).items():
+                expires_in = self.cache.expires_in(key)
+                state = "missing" if expires_in is None else ("fresh" if expires_in >= 0 else "stale")
+                entries[symbol][name] = {
+                    "state": state,
+                    "expires_in": None if expires_in is None else round(expires_in, 1),
+                }
+        return {"entries": entries, "refresher": self.refresher.stats()}
+
+    def invalidate_cache(
+        self,
+        symbol: Annotated[Optional[str], "only drop entries of this ticker symbol"] = None,
+        endpoint: Annotated[Optional[str], "only drop entries of this endpoint, e.g. 'quote'"] = None,
+    ) -> int:
+        """Drop cached Finnhub responses, optionally restricted to a symbol and/or endpoint. Returns the number removed."""
+        def matches(key):
+            if endpoint is not None and key[0] != endpoint:
+                return False
+            return symbol is None or symbol in key[1:] or ("symbol", symbol) in key[1:]
+        return self.cache.invalidate(matches)
+
+    def cache_stats(self) -> dict:
+        return self.cache.stats()
+
     def get_company_profile(self, symbol: Annotated[str, "ticker symbol"]) -> str:
         """Retrieve and format a detailed profile of a company using its stock ticker symbol."""
         
-        profile = self.finnhub_client.company_profile2(symbol=symbol)
+        profile = self.call_finnhub("company_profile2", symbol=symbol)
         
         if not profile:
             return f"\nFailed to find company profile for symbol {symbol} from finnhub!"
 
-        quote = self.finnhub_client.quote(symbol=symbol)
+        quote = self.call_finnhub("quote", symbol=symbol)
         if not quote:
             return f"\nFailed to fetch stock price for symbol {symbol} from finnhub!"
 
@@ -51,6 +232,71 @@ class FinnhubUtils:
         
         return formatted_str
 
+    def sync_company_news(self, symbol: Annotated[str, "ticker symbol"], start_date: str, end_date: str) -> SymbolNews:
+        """Bring the stored news of a symbol up to date for [start_date, end_date], fetching only what is missing:
+        the days before the stored range, and the days since the latest stored item once the poll interval has passed."""
+        news = self.news_store.symbol(symbol)
+        fetch = lambda _from, to: self.news_store.add(news, self.fetch_finnhub("company_news", symbol, _from=_from, to=to))
+
+        with news.lock:
+            if news.covered_from is None:
+                fetch(start_date, end_date)
+                news.covered_from, news.covered_to, news.polled_at = start_date, end_date, time.time()
+            else:
+                # Past kept_from older items would be dropped again right away, pages reaching them use the upstream window
+                if start_date < news.covered_from and news.kept_from is None:
+                    fetch(start_date, news.covered_from)
+                    news.covered_from = start_date
+                poll_due = end_date >= today() and time.time() - news.polled_at >= CACHE_TTLS["company_news"]
+                if end_date > news.covered_to or poll_due:
+                    fetch(min(news.latest_date() or news.covered_to, news.covered_to), end_date)
+                    news.covered_to, news.polled_at = max(news.covered_to, end_date), time.time()
+            self.news_store.prune(news)
+        return news
+
+    def get_company_news_page(
+        self,
+        symbol: Annotated[str, "ticker symbol"],
+        start_date: Annotated[Optional[str], "start date of the search period, yyyy-mm-dd, default to one month ago"] = None,
+        end_date: Annotated[Optional[str], "end date of the search period, yyyy-mm-dd, default to today"] = None,
+        max_news_num: Annotated[int, "maximum number of news to return, default to 10"] = 10,
+        cursor: Annotated[Optional[str], "next_cursor of the previous page, to get older news"] = None,
+    ) -> dict:
+        """Most recent news of a company within a date range, in time order, with the cursor of the next (older) page."""
+
+        # Use default date values if not provided
+        if start_date is None:
+            start_date = today(1)
+        if end_date is None:
+            end_date = today()
+
+        local = False
+        if start_date >= self.news_store.retention_start():
+            news = self.sync_company_news(symbol, start_date, end_date)
+            with news.lock:
+                items, next_cursor = self.news_store.query(news, start_date, end_date, max_news_num, cursor)
+                local = next_cursor is not None or not self.news_store.truncated(news, start_date)
+        if not local:
+            # Older than the store keeps, by date or by count: serve this window straight from the (cached) upstream response
+            news = SymbolNews()
+            self.news_store.add(news, self.call_finnhub("company_news", symbol, _from=start_date, to=end_date))
+            items, next_cursor = self.news_store.query(news, start_date, end_date, max_news_num, cursor)
+
+        if not items and cursor is None:
+            print(f"No company news found for symbol {symbol} from finnhub!")
+
+        news = [
+            {
+                "date": datetime.fromtimestamp(n["datetime"]).strftime("%Y%m%d%H%M%S"),
+                "headline": n["headline"],
+                "url": n["url"],
+                "source": n["source"],
+                "summary": n["summary"],
+            }
+            for n in items
+        ]
+        return {"news": news, "next_cursor": next_cursor}
+
     def get_company_news(
         self,
         symbol: Annotated[str, "ticker symbol"],
@@ -65,37 +311,9 @@ class FinnhubUtils:
         max_news_num: Annotated[
             int, "maximum number of news to return, default to 10"
             ] = 10,
-        ) -> pd.DataFrame:
+        ) -> List[dict]:
             """Fetch recent news articles about a company based on its stock ticker, within a specified date range."""
-
-            # Use default date values if not provided
-            if start_date is None:
-                start_date = today(1)
-            if end_date is None:
-                end_date = today()
-
-            news = self.finnhub_client.company_news(symbol, _from=start_date, to=end_date)
-            
-            if len(news) == 0:
-                print(f"No company news found for symbol {symbol} from finnhub!")
-                
-            news = [
-                {
-                    "date": datetime.fromtimestamp(n["datetime"]).strftime("%Y%m%d%H%M%S"),
-                    "headline": n["headline"],
-                    "url": n["url"],
-                    "source": n["source"],
-                    "summary": n["summary"],
-                }
-                for n in news
-            ]
-            
-            # Select the 10 most recent news if the number of news exceeds the limit
-            if len(news) > max_news_num:
-                news = news[:max_news_num]
-            news.sort(key=lambda x: x["date"])
-            
-            return news
+            return self.get_company_news_page(symbol, start_date, end_date, max_news_num)["news"]
 
     def get_basic_financials_history(
         self,
@@ -105,42 +323,35 @@ class FinnhubUtils:
             "reporting frequency of the company's basic financials: annual / quarterly",
         ],
         start_date: Annotated[
-            str,
-            "start date of the search period for the company's basic financials, yyyy-mm-dd",
-        ] = today(12 * 30),
+            Optional[str],
+            "start date of the search period for the company's basic financials, yyyy-mm-dd, default to 30 years ago",
+        ] = None,
         end_date: Annotated[
-            str,
-            "end date of the search period for the company's basic financials, yyyy-mm-dd",
-        ] = today(),
+            Optional[str],
+            "end date of the search period for the company's basic financials, yyyy-mm-dd, default to today",
+        ] = None,
         selected_columns: Annotated[
             Optional[List[str]],
             "List of column names of news to return, should be chosen from 'assetTurnoverTTM', 'bookValue', 'cashRatio', 'currentRatio', 'ebitPerShare', 'eps', 'ev', 'fcfMargin', 'fcfPerShareTTM', 'grossMargin', 'inventoryTurnoverTTM', 'longtermDebtTotalAsset', 'longtermDebtTotalCapital', 'longtermDebtTotalEquity', 'netDebtToTotalCapital', 'netDebtToTotalEquity', 'netMargin', 'operatingMargin', 'payoutRatioTTM', 'pb', 'peTTM', 'pfcfTTM', 'pretaxMargin', 'psTTM', 'ptbv', 'quickRatio', 'receivablesTurnoverTTM', 'roaTTM', 'roeTTM', 'roicTTM', 'rotcTTM', 'salesPerShare', 'sgaToSale', 'tangibleBookValue', 'totalDebtToEquity', 'totalDebtToTotalAsset', 'totalDebtToTotalCapital', 'totalRatio'",
         ] = None,
-    ) -> pd.DataFrame:
+    ) -> Dict[str, Dict[str, Optional[float]]]:
         """Retrieve historical financial data for a company, specified by stock ticker, for chosen financial metrics over time."""
         
         if freq not in ["annual", "quarterly"]:
             raise ValueError(f"Invalid reporting frequency {freq}. Please specify either 'annual' or 'quarterly'.")
         
-        columns = selected_columns if selected_columns else 'all'
-        
-        basic_financials = self.finnhub_client.company_basic_financials(symbol, columns)
+        # Use default date values if not provided
+        if start_date is None:
+            start_date = today(12 * 30)
+        if end_date is None:
+            end_date = today()
+
+        basic_financials = self.get_basic_financials_table(symbol)
     
-        if not basic_financials["series"]:
+        if not basic_financials.has_series():
             raise ValueError(f"Failed to find basic financials for symbol {symbol} from finnhub! Try a different symbol.")
 
-        output_dict = defaultdict(dict)
-        for metric, value_list in basic_financials["series"].get(freq, {}).items():
-            if selected_columns and metric not in selected_columns:
-                continue
-            for value in value_list:
-                if start_date <= value["period"] <= end_date:
-                    output_dict[metric].update({value["period"]: value["v"]})
-
-        financials_output = pd.DataFrame(output_dict)
-        financials_output = financials_output.rename_axis(index="date")
-
-        return financials_output
+        return basic_financials.history_by_date(freq, start_date, end_date, selected_columns)
 
     def get_basic_financials(
             self,
@@ -149,43 +360,72 @@ class FinnhubUtils:
                 Optional[List[str]],
                 "List of column names of news to return, should be chosen from 'assetTurnoverTTM', 'bookValue', 'cashRatio', 'currentRatio', 'ebitPerShare', 'eps', 'ev', 'fcfMargin', 'fcfPerShareTTM', 'grossMargin', 'inventoryTurnoverTTM', 'longtermDebtTotalAsset', 'longtermDebtTotalCapital', 'longtermDebtTotalEquity', 'netDebtToTotalCapital', 'netDebtToTotalEquity', 'netMargin', 'operatingMargin', 'payoutRatioTTM', 'pb', 'peTTM', 'pfcfTTM', 'pretaxMargin', 'psTTM', 'ptbv', 'quickRatio', 'receivablesTurnoverTTM', 'roaTTM', 'roeTTM', 'roicTTM', 'rotcTTM', 'salesPerShare', 'sgaToSale', 'tangibleBookValue', 'totalDebtToEquity', 'totalDebtToTotalAsset', 'totalDebtToTotalCapital', 'totalRatio','10DayAverageTradingVolume', '13WeekPriceReturnDaily', '26WeekPriceReturnDaily', '3MonthADReturnStd', '3MonthAverageTradingVolume', '52WeekHigh', '52WeekHighDate', '52WeekLow', '52WeekLowDate', '52WeekPriceReturnDaily', '5DayPriceReturnDaily', 'assetTurnoverAnnual', 'assetTurnoverTTM', 'beta', 'bookValuePerShareAnnual', 'bookValuePerShareQuarterly', 'bookValueShareGrowth5Y', 'capexCagr5Y', 'cashFlowPerShareAnnual', 'cashFlowPerShareQuarterly', 'cashFlowPerShareTTM', 'cashPerSharePerShareAnnual', 'cashPerSharePerShareQuarterly', 'currentDividendYieldTTM', 'currentEv/freeCashFlowAnnual', 'currentEv/freeCashFlowTTM', 'currentRatioAnnual', 'currentRatioQuarterly', 'dividendGrowthRate5Y', 'dividendPerShareAnnual', 'dividendPerShareTTM', 'dividendYieldIndicatedAnnual', 'ebitdPerShareAnnual', 'ebitdPerShareTTM', 'ebitdaCagr5Y', 'ebitdaInterimCagr5Y', 'enterpriseValue', 'epsAnnual', 'epsBasicExclExtraItemsAnnual', 'epsBasicExclExtraItemsTTM', 'epsExclExtraItemsAnnual', 'epsExclExtraItemsTTM', 'epsGrowth3Y', 'epsGrowth5Y', 'epsGrowthQuarterlyYoy', 'epsGrowthTTMYoy', 'epsInclExtraItemsAnnual', 'epsInclExtraItemsTTM', 'epsNormalizedAnnual', 'epsTTM', 'focfCagr5Y', 'grossMargin5Y', 'grossMarginAnnual', 'grossMarginTTM', 'inventoryTurnoverAnnual', 'inventoryTurnoverTTM', 'longTermDebt/equityAnnual', 'longTermDebt/equityQuarterly', 'marketCapitalization', 'monthToDatePriceReturnDaily', 'netIncomeEmployeeAnnual', 'netIncomeEmployeeTTM', 'netInterestCoverageAnnual', 'netInterestCoverageTTM', 'netMarginGrowth5Y', 'netProfitMargin5Y', 'netProfitMarginAnnual', 'netProfitMarginTTM', 'operatingMargin5Y', 'operatingMarginAnnual', 'operatingMarginTTM', 'payoutRatioAnnual', 'payoutRatioTTM', 'pbAnnual', 'pbQuarterly', 'pcfShareAnnual', 'pcfShareTTM', 'peAnnual', 'peBasicExclExtraTTM', 'peExclExtraAnnual', 'peExclExtraTTM', 'peInclExtraTTM', 'peNormalizedAnnual', 'peTTM', 'pfcfShareAnnual', 'pfcfShareTTM', 'pretaxMargin5Y', 'pretaxMarginAnnual', 'pretaxMarginTTM', 'priceRelativeToS&P50013Week', 'priceRelativeToS&P50026Week', 'priceRelativeToS&P5004Week', 'priceRelativeToS&P50052Week', 'priceRelativeToS&P500Ytd', 'psAnnual', 'psTTM', 'ptbvAnnual', 'ptbvQuarterly', 'quickRatioAnnual', 'quickRatioQuarterly', 'receivablesTurnoverAnnual', 'receivablesTurnoverTTM', 'revenueEmployeeAnnual', 'revenueEmployeeTTM', 'revenueGrowth3Y', 'revenueGrowth5Y', 'revenueGrowthQuarterlyYoy', 'revenueGrowthTTMYoy', 'revenuePerShareAnnual', 'revenuePerShareTTM', 'revenueShareGrowth5Y', 'roa5Y', 'roaRfy', 'roaTTM', 'roe5Y', 'roeRfy', 'roeTTM', 'roi5Y', 'roiAnnual', 'roiTTM', 'tangibleBookValuePerShareAnnual', 'tangibleBookValuePerShareQuarterly', 'tbvCagr5Y', 'totalDebt/totalEquityAnnual', 'totalDebt/totalEquityQuarterly', 'yearToDatePriceReturnDaily'",
             ] = None,
-        ) -> str:
+        ) -> dict:
             """Get the most recent basic financial data for a company using its stock ticker symbol, with optional specific financial metrics."""
 
-            columns = selected_columns if selected_columns else 'all'
+            basic_financials = self.get_basic_financials_table(symbol)
+            if not basic_financials.has_series():
+                raise ValueError(f"Failed to find basic financials for symbol {symbol} from finnhub! Try a different symbol.")
+
+            return basic_financials.latest(selected_columns)
+
+    def get_company_peers(self, symbol: Annotated[str, "ticker symbol"]) -> List[str]:
+        """Symbols of the companies in the same Finnhub industry (finnhubIndustry of the profile) as symbol, symbol first."""
+        peers = self.call_finnhub("company_peers", symbol) or []
+        return list(dict.fromkeys([symbol, *peers]))
 
-            basic_financials = self.finnhub_client.company_basic_financials(symbol, columns)
-            if not basic_financials["series"]:
-                return f"Failed to find basic financials for symbol {symbol} from finnhub! Try a different symbol."
+    def is_basic_financials_cached(self, symbol: Annotated[str, "ticker symbol"]) -> bool:
+        """Whether the basic financials of symbol can be served from the cache, fresh or stale."""
+        return self.cache.expires_in(self.basic_financials_call(symbol)[0]) is not None
 
-            output_dict = basic_financials["metric"]
-            for metric, value_list in basic_financials["series"]["quarterly"].items():
-                if value_list: 
-                    value = value_list[0]
-                    output_dict.update({metric: value["v"]})
+    def prefetch_basic_financials(self, symbol: Annotated[str, "ticker symbol"]) -> None:
+        """Load the basic financials of symbol into the cache in the background, with the quota left over by requests."""
+        key, fetch = self.basic_financials_call(symbol)
+        self.refresher.submit(key, lambda: self.refresh("company_basic_financials", key, fetch))
+
+    def get_peer_comparison(
+        self,
+        symbols: Annotated[List[str], "ticker symbols to compare"],
+        selected_columns: Annotated[Optional[List[str]], "metrics to compare, every numeric metric if None"] = None,
+    ) -> dict:
+        """Rank, percentile and z-score of the latest basic financials of each symbol among the others, with the
+        median, mean and std of each metric, as a compact table (see peer_utils.compare_peers).
+        Symbols without basic financials are left out."""
+        # peer_utils imports numpy, only load it when a comparison is asked for
+        from utils.peer_utils import compare_peers
 
-            if selected_columns:
-                output_dict = {k: v for k, v in output_dict.items() if k in selected_columns}
-            
-            
-            return json.dumps(output_dict, indent=2)
+        rows, compared = [], []
+        for symbol in symbols:
+            basic_financials = self.get_basic_financials_table(symbol)
+            if basic_financials.metric or basic_financials.has_series():
+                compared.append(symbol)
+                rows.append(basic_financials.latest_numeric())
+        return compare_peers(compared, rows, selected_columns)
+
+    def sec_filing_params(
+        self,
+        symbol: Annotated[str, "ticker symbol"],
+        form: Annotated[str, "Form type from the list : '10-k', '10-q', '8-k'.. "] = "10-K",
+        from_date: Annotated[Optional[str], "From date, format yyyy-mm-dd, default to one year ago"] = None,
+        to_date: Annotated[Optional[str], "To date, format yyyy-mm-dd, default to today"] = None,
+    ) -> dict:
+        return {
+            'symbol': symbol,
+            'form': form,
+            '_from': from_date or today(12),
+            'to': to_date or today()
+        }
 
     def get_sec_filing(self,
                         symbol: Annotated[str, "ticker symbol"], 
                         form: Annotated[str, "Form type from the list : '10-k', '10-q', '8-k'.. "] = "10-K", 
-                        from_date: Annotated[str, "From date, format yyyy-mm-dd"] = today(12), 
-                        to_date: Annotated[str, "To date, format yyyy-mm-dd"] = today(),
+                        from_date: Annotated[Optional[str], "From date, format yyyy-mm-dd, default to one year ago"] = None, 
+                        to_date: Annotated[Optional[str], "To date, format yyyy-mm-dd, default to today"] = None,
                         ) -> str:
         """Obtain the most recent SEC filing for a company specified by its stock ticker, within a given date range."""
         
-        params = {
-            'symbol': symbol,
-            'form': form,
-            '_from': from_date,
-            'to': to_date
-        }
-        
-        filings = self.finnhub_client.filings(**params)
+        key, fetch = self.filings_call(**self.sec_filing_params(symbol, form, from_date, to_date))
+        filings = self.cached("filings", key, fetch)
                     
         if filings:   
             latest_filing = max(filings, key=lambda x: x['filedDate'])
@@ -194,6 +434,59 @@ class FinnhubUtils:
             print("No filings found for the provided criteria.")
             return {}
 
+    def resolve_sec_filing(
+        self,
+        symbol: Annotated[str, "ticker symbol"],
+        fyear: Annotated[Optional[str], "year the filing was filed in, default to the last 12 months"] = None,
+        form: Annotated[str, "Form type from the list : '10-k', '10-q', '8-k'.. "] = "10-K",
+    ) -> dict:
+        """Latest filing of a company filed in fyear, answered from the filing index when it has it
+        (or knows there is none), else fetched from Finnhub and indexed. Without fyear, the index answers
+        once a sync covers the last 12 months, up to as recently as a cached filings response would."""
+        filing_index = get_filing_index()
+        if not fyear:
+            from_date = today(12)
+            synced = filing_index.latest_synced_range(symbol, form)
+            fresh_since = (datetime.now() - timedelta(seconds=CACHE_TTLS["filings"])).strftime("%Y-%m-%d")
+            if synced is None or synced[0] > from_date or synced[1] < fresh_since:
+                return self.get_sec_filing(symbol, form)
+            filings = filing_index.filings(symbol, form)
+            return filings[0] if filings and filings[0]["filedDate"][:10] >= from_date else {}
+
+        filing = filing_index.get(symbol, form, fyear)
+        if filing is not None:
+            return filing
+        if filing_index.is_synced(symbol, form, f"{fyear}-01-01", f"{fyear}-12-31"):
+            return {}
+        return self.get_sec_filing(symbol, form, f"{fyear}-01-01", f"{fyear}-12-31")
+
+    def sync_filings(
+        self,
+        symbol: Annotated[str, "ticker symbol"],
+        form: Annotated[str, "Form type from the list : '10-k', '10-q', '8-k'.. "] = "10-K",
+        from_date: Annotated[Optional[str], "load filings since this date, yyyy-mm-dd, default to 30 years ago"] = None,
+    ) -> int:
+        """Load the filings of a company into the filing index. Once a symbol is synced, only the filings
+        since the last sync are fetched. Returns the number of filings added or updated."""
+        if from_date is None:
+            from_date = today(12 * 30)
+
+        filing_index = get_filing_index()
+        synced = filing_index.latest_synced_range(symbol, form)
+        to_date = today()
+        if synced is not None and synced[0] <= from_date:
+            range_start, fetch_from = synced[0], synced[1]
+        else:
+            range_start = fetch_from = from_date
+
+        filings = self.fetch_finnhub("filings", symbol=symbol, form=form, _from=fetch_from, to=to_date)
+        return filing_index.add(symbol, form, filings, range_start, to_date)
+
+@lru_cache(maxsize=None)
+def get_finnhub_utils() -> FinnhubUtils:
+    """Process-wide FinnhubUtils, constructed on first use so its cache is shared by every caller."""
+    return FinnhubUtils()
+
 if __name__ == "__main__":
     if len(sys.argv) < 2:
         print("Usage: python finnhub_utils.py <SYMBOL>")
@@ -0,0 +1,102 @@
+import os
+import threading
+from typing import Annotated, Any, Dict, Tuple
+from utils.other_utils import load_env
+from utils.executor_utils import UPSTREAM_DEFAULTS
+
+# Per-upstream (connect timeout, read timeout, connection retries). Override with <UPSTREAM>_HTTP_CONNECT_TIMEOUT /
+# <UPSTREAM>_HTTP_READ_TIMEOUT / <UPSTREAM>_HTTP_RETRIES in .env. The pool size defaults to the
+# upstream's <UPSTREAM>_MAX_CONCURRENCY and can be set with <UPSTREAM>_HTTP_POOL_SIZE.
+HTTP_DEFAULTS = {
+    "finnhub": (3.05, 10.0, 2),
+    "sec_api": (3.05, 60.0, 2),
+}
+
+
+def http_session_settings(upstream: Annotated[str, "upstream name, e.g. 'finnhub'"]) -> Tuple[int, Tuple[float, float], int]:
+    """(pool size, (connect timeout, read timeout), retries) of an upstream, reading .env overrides first."""
+    load_env()
+    prefix = upstream.upper()
+    connect_timeout, read_timeout, retries = HTTP_DEFAULTS[upstream]
+    max_concurrency = int(os.environ.get(f"{prefix}_MAX_CONCURRENCY", UPSTREAM_DEFAULTS[upstream][0]))
+    return (
+        int(os.environ.get(f"{prefix}_HTTP_POOL_SIZE", max_concurrency)),
+        (
+            float(os.environ.get(f"{prefix}_HTTP_CONNECT_TIMEOUT", connect_timeout)),
+            float(os.environ.get(f"{prefix}_HTTP_READ_TIMEOUT", read_timeout)),
+        ),
+        int(os.environ.get(f"{prefix}_HTTP_RETRIES", retries)),
+    )
+
+
+class PooledSession:
+    """Long-lived keep-alive requests.Session of one upstream, shared by every client of that upstream.
+
+    Its connection pool holds as many connections as the upstream may have calls in flight,
+    so concurrent calls reuse warm TCP/TLS connections instead of opening new ones. Requests
+    without an explicit timeout get the upstream's (connect, read) timeout.
+    """
+
+    def __init__(self, upstream: Annotated[str, "upstream name, e.g. 'finnhub'"]):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        self.upstream = upstream
+        self.pool_size, self.timeout, self.retries = http_session_settings(upstream)
+        # Only connection errors are retried here: 429 and 5xx answers are retried by the upstream's
+        # RateLimiter.call, which backs off, and retrying them here too would multiply the requests per call
+        retry = Retry(
+            total=self.retries,
+            read=0,
+            status=0,
+            allowed_methods=frozenset(["GET"]),
+            backoff_factor=0.3,
+            raise_on_status=False,
+        )
+        self.adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size, pool_block=True, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("https://", self.adapter)
+        self.session.mount("http://", self.adapter)
+
+    def get(self, url: str, **kwargs: Any) -> Any:
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.get(url, **kwargs)
+
+    def stats(self) -> Dict[str, Any]:
+        """Requests sent and connections opened per host; reuse_ratio is the share of requests sent on a reused connection."""
+        requests_sent = connections_opened = 0
+        hosts = {}
+        pools = self.adapter.poolmanager.pools
+        for pool in filter(None, map(pools.get, pools.keys())):
+            requests_sent += pool.num_requests
+            connections_opened += pool.num_connections
+            hosts[pool.host] = {"requests": pool.num_requests, "connections_opened": pool.num_connections}
+        return {
+            "pool_size": self.pool_size,
+            "connect_timeout": self.timeout[0],
+            "read_timeout": self.timeout[1],
+            "retries": self.retries,
+            "requests": requests_sent,
+            "connections_opened": connections_opened,
+            "reuse_ratio": round(1 - connections_opened / requests_sent, 4) if requests_sent else 0.0,
+            "hosts": hosts,
+        }
+
+
+http_sessions: Dict[str, PooledSession] = {}
+http_sessions_lock = threading.Lock()
+
+def get_http_session(upstream: Annotated[str, "upstream name, e.g. 'finnhub'"]) -> PooledSession:
+    """Process-wide PooledSession of an upstream, created on first use."""
+    with http_sessions_lock:
+        if upstream not in http_sessions:
+            http_sessions[upstream] = PooledSession(upstream)
+        return http_sessions[upstream]
+
+
+def http_session_stats() -> Dict[str, Dict[str, Any]]:
+    """Stats of the pooled sessions created so far, by upstream."""
+    with http_sessions_lock:
+        sessions = dict(http_sessions)
+    return {upstream: session.stats() for upstream, session in sessions.items()}
@@ -0,0 +1,199 @@
+import re
+import time
+import asyncio
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Annotated, Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+
+def format_labels(labelnames: Tuple[str, ...], labelvalues: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(labelnames, labelvalues)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.values: Dict[Tuple[str, ...], float] = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for key, value in self.values.items():
+                lines.append(f"{self.name}{format_labels(self.labelnames, key)} {format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        # labelvalues -> [count per bucket (non cumulative, last one is +Inf), sum]
+        self.values: Dict[Tuple[str, ...], list] = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            entry = self.values.get(key)
+            if entry is None:
+                entry = self.values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for key, (counts, total) in self.values.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = 'le="%s"' % format_value(bound)
+                    lines.append(f"{self.name}_bucket{format_labels(self.labelnames, key, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{format_labels(self.labelnames, key)} {format_value(total)}")
+                lines.append(f"{self.name}_count{format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class GaugeCallback:
+    """Gauge whose values are read from a callback at scrape time, e.g. cache sizes or queue depths."""
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...], callback: Callable[[], Dict[Tuple[str, ...], float]]):
+        self.name = name
+        self.help = help
+        self.labelnames = labelnames
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        for key, value in self.callback().items():
+            lines.append(f"{self.name}{format_labels(self.labelnames, key)} {format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+upstream_call_seconds = registry.register(Histogram(
+    "upstream_call_seconds", "Duration of calls to upstream APIs.", ("upstream", "operation"),
+))
+upstream_errors_total = registry.register(Counter(
+    "upstream_errors_total", "Failed calls to upstream APIs, by status code (or exception type).", ("upstream", "operation", "status"),
+))
+http_request_seconds = registry.register(Histogram(
+    "http_request_seconds", "Duration of API requests, until the last response byte is sent.", ("route", "method"),
+))
+http_requests_total = registry.register(Counter(
+    "http_requests_total", "API requests, by response status.", ("route", "method", "status"),
+))
+http_response_bytes_total = registry.register(Counter(
+    "http_response_bytes_total", "Bytes of response bodies sent.", ("route",),
+))
+event_loop_lag_seconds = registry.register(Histogram(
+    "event_loop_lag_seconds", "Delay between when the event loop should wake a sleeping task and when it does.", (), LOOP_LAG_BUCKETS,
+))
+
+
+def error_status(e: Exception) -> str:
+    """HTTP status of a failed upstream call if the exception carries one, else the exception type."""
+    status_code = getattr(e, "status_code", None)
+    if status_code is None:
+        match = re.match(r"API error: (\d+)", str(e))
+        status_code = match.group(1) if match else None
+    return str(status_code) if status_code is not None else type(e).__name__
+
+
+@contextmanager
+def timed_upstream(
+    upstream: Annotated[str, "upstream name, e.g. 'finnhub'"],
+    operation: Annotated[str, "upstream endpoint or method, e.g. 'quote'"],
+) -> Iterator[None]:
+    """Time one upstream call and count it as an error if it raises."""
+    started_at = time.perf_counter()
+    try:
+        yield
+    except Exception as e:
+        upstream_errors_total.inc(upstream=upstream, operation=operation, status=error_status(e))
+        raise
+    finally:
+        upstream_call_seconds.observe(time.perf_counter() - started_at, upstream=upstream, operation=operation)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status and response size of every request.
+    Paths that are not routes of the app are grouped under route="other" to bound label cardinality."""
+
+    def __init__(self, app, route_paths: Optional[Callable[[], set]] = None):
+        self.app = app
+        self.route_paths = route_paths
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        path = scope["path"]
+        route = path if self.route_paths is not None and path in self.route_paths() else "other"
+        started_at = time.perf_counter()
+        status = 500
+        sent_bytes = 0
+
+        async def send_with_metrics(message):
+            nonlocal status, sent_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                sent_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            http_request_seconds.observe(time.perf_counter() - started_at, route=route, method=scope["method"])
+            http_requests_total.inc(route=route, method=scope["method"], status=status)
+            http_response_bytes_total.inc(sent_bytes, route=route)
+
+
+async def sample_event_loop_lag(interval: Annotated[float, "seconds between two samples"] = 0.5) -> None:
+    """Forever measure how late the event loop wakes up a task sleeping for interval seconds."""
+    while True:
+        started_at = time.perf_counter()
+        await asyncio.sleep(interval)
+        event_loop_lag_seconds.observe(max(0.0, time.perf_counter() - started_at - interval))
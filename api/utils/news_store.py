@@ -0,0 +1,134 @@
+import threading
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from typing import Annotated, Dict, List, Optional, Tuple
+
+
+def news_key(item: dict) -> str:
+    """Identity of a news item: its Finnhub id, or its url when there is none."""
+    return str(item.get("id") or item["url"])
+
+
+def encode_cursor(timestamp: int, key: str) -> str:
+    return f"{timestamp}:{key}"
+
+
+def decode_cursor(cursor: str) -> Tuple[int, str]:
+    timestamp, _, key = cursor.partition(":")
+    if not timestamp.isdigit() or not key:
+        raise ValueError(f"Invalid news cursor {cursor}.")
+    return int(timestamp), key
+
+
+class SymbolNews:
+    """News of one symbol, kept in time order, with the date range already fetched from upstream.
+    When items of that range were dropped to stay within max_items, kept_from is the (datetime, key)
+    of the oldest item still stored; older items of the range are only available upstream."""
+
+    def __init__(self):
+        self.items: Dict[str, dict] = {}
+        self.order: List[Tuple[int, str]] = []
+        self.covered_from: Optional[str] = None
+        self.covered_to: Optional[str] = None
+        self.kept_from: Optional[Tuple[int, str]] = None
+        self.polled_at = 0.0
+        self.lock = threading.Lock()
+
+    def latest_date(self) -> Optional[str]:
+        if not self.order:
+            return None
+        return datetime.fromtimestamp(self.order[-1][0]).strftime("%Y-%m-%d")
+
+
+class NewsStore:
+    """In-memory per-symbol news store, filled incrementally from Finnhub company_news.
+
+    Items are de-duplicated by id (or url) and kept sorted by time, so the most recent
+    items and cursor pages are answered locally. Each symbol keeps at most max_items
+    items no older than retention_days.
+    """
+
+    def __init__(
+        self,
+        max_items: Annotated[int, "maximum number of items kept per symbol"] = 1000,
+        retention_days: Annotated[int, "items older than this are dropped"] = 90,
+    ):
+        self.max_items = max_items
+        self.retention_days = retention_days
+        self.symbols: Dict[str, SymbolNews] = {}
+        self.lock = threading.Lock()
+
+    def symbol(self, symbol: str) -> SymbolNews:
+        with self.lock:
+            if symbol not in self.symbols:
+                self.symbols[symbol] = SymbolNews()
+            return self.symbols[symbol]
+
+    def retention_start(self) -> str:
+        return (datetime.now() - timedelta(days=self.retention_days)).strftime("%Y-%m-%d")
+
+    def add(self, news: SymbolNews, raw_items: List[dict]) -> int:
+        """Add upstream items to a symbol's news, skipping ones already stored. Returns the number added.
+        Call with news.lock held, then prune."""
+        added = 0
+        for n in raw_items:
+            key = news_key(n)
+            if key in news.items:
+                continue
+            news.items[key] = {
+                "datetime": n["datetime"],
+                "headline": n["headline"],
+                "url": n["url"],
+                "source": n["source"],
+                "summary": n["summary"],
+            }
+            insort(news.order, (n["datetime"], key))
+            added += 1
+        return added
+
+    def prune(self, news: SymbolNews) -> None:
+        """Drop items beyond retention or beyond max_items, oldest first. Retention moves the covered
+        range up to the cutoff; items dropped by count keep their range covered and set kept_from."""
+        cutoff_date = self.retention_start()
+        cutoff = (int(datetime.strptime(cutoff_date, "%Y-%m-%d").timestamp()), "")
+        expired = bisect_left(news.order, cutoff)
+        drop = max(expired, len(news.order) - self.max_items)
+        if drop > expired:
+            news.kept_from = news.order[drop]
+        elif news.kept_from is not None and news.kept_from < cutoff:
+            news.kept_from = None
+        if news.covered_from is not None and news.covered_from < cutoff_date:
+            news.covered_from = cutoff_date
+        for _, key in news.order[:drop]:
+            del news.items[key]
+        del news.order[:drop]
+
+    def truncated(self, news: SymbolNews, start_date: Annotated[str, "yyyy-mm-dd"]) -> bool:
+        """Whether items from start_date on were dropped by count, so a query reaching them is incomplete."""
+        start_ts = int(datetime.strptime(start_date, "%Y-%m-%d").timestamp())
+        return news.kept_from is not None and start_ts <= news.kept_from[0]
+
+    def query(
+        self,
+        news: SymbolNews,
+        start_date: Annotated[str, "yyyy-mm-dd, inclusive"],
+        end_date: Annotated[str, "yyyy-mm-dd, inclusive"],
+        limit: Annotated[int, "maximum number of items to return"],
+        cursor: Annotated[Optional[str], "next_cursor of the previous page"] = None,
+    ) -> Tuple[List[dict], Optional[str]]:
+        """The limit most recent items between start_date and end_date (older than cursor if given),
+        in time order, and the cursor of the next, older page. Call with news.lock held."""
+        start_ts = int(datetime.strptime(start_date, "%Y-%m-%d").timestamp())
+        end_ts = int((datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1)).timestamp())
+        lo = bisect_left(news.order, (start_ts, ""))
+        hi = bisect_left(news.order, (end_ts, ""))
+        if cursor is not None:
+            hi = min(hi, bisect_left(news.order, decode_cursor(cursor)))
+
+        page = news.order[max(lo, hi - limit):hi]
+        next_cursor = encode_cursor(*page[0]) if page and hi - len(page) > lo else None
+        return [news.items[key] for _, key in page], next_cursor
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"symbols": len(self.symbols), "items": sum(len(news.order) for news in self.symbols.values())}
@@ -1,6 +1,6 @@
-import pandas as pd
 from typing import Annotated
 from datetime import datetime, timedelta
+from functools import lru_cache
 
 SavePathType = Annotated[str, "File path to save data. If None, data is not saved."]
 
@@ -8,3 +8,9 @@ def today(months_before: int = 0) -> str:
     modified_date = datetime.now() - timedelta(days=30.4 * months_before)
     return modified_date.strftime("%Y-%m-%d")
 
+@lru_cache(maxsize=None)
+def load_env() -> None:
+    """Load .env into the environment once, on first use rather than at import time."""
+    from dotenv import load_dotenv
+    load_dotenv(".env")
+
@@ -0,0 +1,188 @@
+import os
+import re
+import time
+import sqlite3
+import tempfile
+from functools import lru_cache
+from typing import Annotated, List, Optional, Sequence
+from utils.sqlite_utils import create_database, thread_connection
+
+
+DEFAULT_INDEX_PATH = os.path.join(tempfile.gettempdir(), "ai-agent-cache", "sec_passages.sqlite3")
+
+# Paragraphs shorter than PASSAGE_MIN_CHARS are merged with the next ones, longer than PASSAGE_MAX_CHARS are split
+PASSAGE_MIN_CHARS = 400
+PASSAGE_MAX_CHARS = 2000
+
+# The passages of indexed section id get rowids [id * ROWIDS_PER_SECTION, (id + 1) * ROWIDS_PER_SECTION),
+# so a section's passages are deleted by rowid range instead of a scan of the whole index
+ROWIDS_PER_SECTION = 1_000_000
+
+SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS passages USING fts5(
+    text,
+    symbol UNINDEXED,
+    year UNINDEXED,
+    section UNINDEXED,
+    report_url UNINDEXED,
+    passage_index UNINDEXED,
+    tokenize = 'porter unicode61'
+);
+CREATE TABLE IF NOT EXISTS indexed_sections (
+    id INTEGER PRIMARY KEY,
+    report_url TEXT NOT NULL,
+    section TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    year TEXT NOT NULL,
+    num_passages INTEGER NOT NULL,
+    indexed_at REAL NOT NULL,
+    UNIQUE (report_url, section)
+);
+"""
+
+
+def split_passages(text: Annotated[str, "section text"]) -> List[str]:
+    """Split a section into passages of whole paragraphs, of roughly PASSAGE_MIN_CHARS to PASSAGE_MAX_CHARS characters."""
+    passages, current = [], ""
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = " ".join(paragraph.split())
+        while len(paragraph) > PASSAGE_MAX_CHARS:
+            cut = paragraph.rfind(" ", PASSAGE_MIN_CHARS, PASSAGE_MAX_CHARS)
+            cut = cut if cut > 0 else PASSAGE_MAX_CHARS
+            passages.append(paragraph[:cut])
+            paragraph = paragraph[cut:].lstrip()
+        if not paragraph:
+            continue
+        current = f"{current}\n\n{paragraph}" if current else paragraph
+        if len(current) >= PASSAGE_MIN_CHARS:
+            passages.append(current)
+            current = ""
+    if current:
+        passages.append(current)
+    return passages
+
+
+def match_expression(query: Annotated[str, "free-text query"]) -> Optional[str]:
+    """FTS5 expression matching any word of a free-text query, ranked by bm25. None if the query has no words."""
+    words = list(dict.fromkeys(word.lower() for word in re.findall(r"\w+", query)))[:32]
+    return " OR ".join(f'"{word}"' for word in words) or None
+
+
+class PassageIndex:
+    """Local SQLite FTS5 index of 10-K section passages, for bm25-ranked passage search.
+
+    Sections are indexed as they are retrieved, so searches only touch local data. Once
+    more than max_sections are indexed, the least recently indexed ones are dropped.
+    """
+
+    def __init__(
+        self,
+        path: Annotated[Optional[str], "path of the SQLite database file"] = None,
+        max_sections: Annotated[Optional[int], "number of sections above which old ones are dropped"] = None,
+    ):
+        self.path = path or os.environ.get("SEC_PASSAGE_INDEX_PATH", DEFAULT_INDEX_PATH)
+        self.max_sections = max_sections if max_sections is not None else int(os.environ.get("SEC_PASSAGE_INDEX_MAX_SECTIONS", 2000))
+        create_database(self.path, SCHEMA)
+
+    def connection(self) -> sqlite3.Connection:
+        """Return this thread's connection to the index, opening it on first use."""
+        return thread_connection(self.path)
+
+    def has(self, report_url: str, section: str) -> bool:
+        row = self.connection().execute(
+            "SELECT 1 FROM indexed_sections WHERE report_url = ? AND section = ?", (report_url, section)
+        ).fetchone()
+        return row is not None
+
+    def add(
+        self,
+        report_url: str,
+        section: str,
+        text: str,
+        symbol: Annotated[str, "ticker symbol of the report"],
+        year: Annotated[Optional[str], "fiscal year of the report, if known"] = None,
+    ) -> int:
+        """Index the passages of a section, replacing any previous copy. Returns the number of passages."""
+        passages = split_passages(text)[:ROWIDS_PER_SECTION]
+        with self.connection() as conn:
+            self.delete(conn, report_url, section)
+            section_id = conn.execute(
+                "INSERT INTO indexed_sections (report_url, section, symbol, year, num_passages, indexed_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (report_url, section, symbol, year or "", len(passages), time.time()),
+            ).lastrowid
+            conn.executemany(
+                "INSERT INTO passages (rowid, text, symbol, year, section, report_url, passage_index) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (section_id * ROWIDS_PER_SECTION + i, passage, symbol, year or "", section, report_url, i)
+                    for i, passage in enumerate(passages)
+                ],
+            )
+            self.evict(conn)
+        return len(passages)
+
+    def delete(self, conn: sqlite3.Connection, report_url: str, section: str) -> None:
+        row = conn.execute("SELECT id FROM indexed_sections WHERE report_url = ? AND section = ?", (report_url, section)).fetchone()
+        if row is None:
+            return
+        conn.execute("DELETE FROM passages WHERE rowid >= ? AND rowid < ?", (row[0] * ROWIDS_PER_SECTION, (row[0] + 1) * ROWIDS_PER_SECTION))
+        conn.execute("DELETE FROM indexed_sections WHERE id = ?", (row[0],))
+
+    def evict(self, conn: sqlite3.Connection) -> int:
+        """Drop the least recently indexed sections beyond max_sections. Returns the number dropped."""
+        rows = conn.execute(
+            "SELECT report_url, section FROM indexed_sections ORDER BY indexed_at DESC LIMIT -1 OFFSET ?", (self.max_sections,)
+        ).fetchall()
+        for report_url, section in rows:
+            self.delete(conn, report_url, section)
+        return len(rows)
+
+    def search(
+        self,
+        query: Annotated[str, "free-text query, e.g. 'supply chain risk'"],
+        k: Annotated[int, "number of passages to return"] = 5,
+        symbols: Annotated[Optional[Sequence[str]], "only search reports of these symbols"] = None,
+        years: Annotated[Optional[Sequence[str]], "only search reports of these fiscal years"] = None,
+        sections: Annotated[Optional[Sequence[str]], "only search these sections"] = None,
+    ) -> List[dict]:
+        """Top k passages for query, best first, with the symbol, year and section they come from."""
+        expression = match_expression(query)
+        if expression is None:
+            return []
+        sql = (
+            "SELECT symbol, year, section, report_url, passage_index, text, bm25(passages) AS score "
+            "FROM passages WHERE passages MATCH ?"
+        )
+        params: list = [expression]
+        for column, values in (("symbol", symbols), ("year", years), ("section", sections)):
+            if values:
+                sql += f" AND {column} IN ({', '.join('?' * len(values))})"
+                params.extend(values)
+        sql += " ORDER BY score LIMIT ?"
+        params.append(k)
+
+        rows = self.connection().execute(sql, params).fetchall()
+        return [
+            {
+                "symbol": symbol,
+                "year": year or None,
+                "section": section,
+                "report_url": report_url,
+                "passage_index": passage_index,
+                "text": text,
+                # bm25() is lower for better matches, flip it so higher scores are better
+                "score": round(-score, 6),
+            }
+            for symbol, year, section, report_url, passage_index, text, score in rows
+        ]
+
+    def stats(self) -> dict:
+        sections, passages = self.connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(num_passages), 0) FROM indexed_sections"
+        ).fetchone()
+        return {"path": self.path, "sections": sections, "passages": passages, "max_sections": self.max_sections}
+
+
+@lru_cache(maxsize=None)
+def get_passage_index() -> PassageIndex:
+    """Process-wide PassageIndex, opened on first use."""
+    return PassageIndex()
@@ -0,0 +1,112 @@
+import threading
+from typing import Annotated, Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Process-wide numbering of metric names, so the metrics of many symbols are laid out in a matrix
+# with integer array operations instead of one dict lookup per value
+metric_names: List[str] = []
+metric_ids: Dict[str, int] = {}
+metric_ids_lock = threading.Lock()
+
+
+def metric_id(name: str) -> int:
+    number = metric_ids.get(name)
+    if number is None:
+        with metric_ids_lock:
+            number = metric_ids.setdefault(name, len(metric_names))
+            if number == len(metric_names):
+                metric_names.append(name)
+    return number
+
+
+def numeric_row(metrics: Annotated[Dict[str, Any], "metric name -> value, e.g. BasicFinancialsTable.latest()"]) -> Tuple[np.ndarray, np.ndarray]:
+    """(metric ids, values) arrays of the numeric values of metrics; dates, strings and None are left out."""
+    numeric = [(metric_id(name), value) for name, value in metrics.items() if type(value) in (int, float)]
+    return np.array([i for i, _ in numeric], dtype=np.intp), np.array([v for _, v in numeric], dtype=float)
+
+
+def metrics_matrix(
+    rows: Annotated[Sequence[Tuple[np.ndarray, np.ndarray]], "numeric_row of each symbol"],
+    metrics: Annotated[Optional[Sequence[str]], "metrics to keep, every metric of any row if None"] = None,
+) -> Tuple[List[str], np.ndarray]:
+    """(metric names, symbols x metrics matrix) of the rows, NaN where a row has no value for a metric.
+    Metrics are sorted by name; all rows are scattered into the matrix in one assignment."""
+    ids = np.concatenate([row[0] for row in rows]) if rows else np.array([], dtype=np.intp)
+    values = np.concatenate([row[1] for row in rows]) if rows else np.array([], dtype=float)
+    row_of = np.repeat(np.arange(len(rows)), [len(row[0]) for row in rows])
+
+    if metrics is None:
+        columns = np.unique(ids).tolist()
+    else:
+        columns = list({metric_ids[name] for name in metrics if name in metric_ids})
+    columns.sort(key=metric_names.__getitem__)
+
+    slot = np.full(len(metric_names), -1, dtype=np.intp)
+    slot[columns] = np.arange(len(columns))
+    cols = slot[ids]
+    found = cols >= 0
+    matrix = np.full((len(rows), len(columns)), np.nan)
+    matrix[row_of[found], cols[found]] = values[found]
+    return [metric_names[column] for column in columns], matrix
+
+
+def compare_peers(
+    symbols: Annotated[Sequence[str], "symbols compared"],
+    rows: Annotated[Sequence[Tuple[np.ndarray, np.ndarray]], "numeric_row of each symbol"],
+    metrics: Annotated[Optional[Sequence[str]], "metrics to compare, every metric if None"] = None,
+) -> dict:
+    """Position of each symbol among the others, metric by metric, computed in one vectorized pass.
+
+    The result is a compact table: symbols and metrics name the rows and columns of the values,
+    ranks (1 for the highest value, ties share the best rank), percentiles (share of the other
+    symbols at or below the value) and z-scores matrices, while count, median, mean and std hold
+    the statistics of each metric. Metrics no symbol has a value for are left out.
+
+    Matrices and statistics are returned as numpy arrays with NaN for missing values, which
+    serialization_utils.dumps writes as null without going through Python lists. Ranks are
+    integers, so they are returned as nested lists with None for missing values.
+    """
+    names, matrix = metrics_matrix(rows, metrics)
+    missing = np.isnan(matrix)
+    count = len(symbols) - np.count_nonzero(missing, axis=0)
+    kept = count > 0
+    names = [name for name, keep in zip(names, kept) if keep]
+    # Column selection can leave a Fortran-ordered copy, orjson only serializes C-contiguous arrays
+    matrix, count = np.ascontiguousarray(matrix[:, kept]), count[kept]
+    missing = np.isnan(matrix)
+    n = matrix.shape[0]
+
+    # One sort per column, highest first and missing values last, gives both the ranks and the medians
+    order = np.argsort(np.where(missing, np.inf, -matrix), axis=0, kind="stable")
+    ordered = np.take_along_axis(matrix, order, axis=0)
+    starts = np.ones(ordered.shape, dtype=bool)
+    starts[1:] = ordered[1:] != ordered[:-1]
+    sorted_ranks = np.maximum.accumulate(np.where(starts, np.arange(1, n + 1)[:, None], 0), axis=0)
+    ranks = np.empty(matrix.shape, dtype=int)
+    np.put_along_axis(ranks, order, sorted_ranks, axis=0)
+
+    if n:
+        median = np.take_along_axis(ordered, np.stack([(count - 1) // 2, count // 2]), axis=0).mean(axis=0)
+    else:
+        median = np.full(len(names), np.nan)
+    mean = np.where(missing, 0.0, matrix).sum(axis=0) / np.maximum(count, 1)
+    deviations = np.where(missing, 0.0, matrix - mean)
+    std = np.sqrt((deviations ** 2).sum(axis=0) / np.maximum(count, 1))
+    zscores = np.divide(deviations, std, out=np.zeros_like(deviations), where=std > 0)
+    zscores[missing] = np.nan
+    percentiles = 100 * (count - ranks) / np.maximum(count - 1, 1)
+    percentiles[missing | (count < 2)] = np.nan
+
+    return {
+        "symbols": list(symbols),
+        "metrics": names,
+        "values": matrix,
+        "ranks": np.where(missing, None, ranks).tolist(),
+        "percentiles": np.round(percentiles, 2),
+        "zscores": np.round(zscores, 4),
+        "count": count,
+        "median": np.round(median, 6),
+        "mean": np.round(mean, 6),
+        "std": np.round(std, 6),
+    }
@@ -0,0 +1,126 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Annotated, Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+# name of a watched response -> (cache key, function refreshing the cached response)
+WatchedCalls = Dict[str, Tuple[Hashable, Callable[[], Any]]]
+
+
+class RefreshScheduler:
+    """Background thread refreshing cache entries.
+
+    It serves two kinds of work, one refresh at a time:
+    - stale entries handed over by readers through submit(), refreshed first, once per key;
+    - the responses of every watched symbol, revisited once per interval, one every
+      interval / (number of responses) seconds so upstream calls are spread evenly. Entries
+      still fresh at the next visit are skipped, without calling the upstream.
+    Refresh functions are expected to wait for the upstream quota, so a large watchlist makes
+    the cycle slower than interval instead of exhausting the quota.
+    """
+
+    def __init__(
+        self,
+        expires_in: Annotated[Callable[[Hashable], Optional[float]], "seconds before a cached key turns stale, None if missing"],
+        watched_calls: Annotated[Callable[[str], WatchedCalls], "cache keys and refresh functions of a watched symbol"],
+        interval: Annotated[float, "seconds between two visits of the same watched response"] = 60.0,
+        symbols: Annotated[Iterable[str], "initial watchlist"] = (),
+    ):
+        self.expires_in = expires_in
+        self.watched_calls = watched_calls
+        self.interval = interval
+        self.symbols = set(symbols)
+        self.urgent: "OrderedDict[Hashable, Callable[[], Any]]" = OrderedDict()
+        self.cycle: List[Tuple[Hashable, Callable[[], Any]]] = []
+        self.spacing = interval
+        self.next_slot = time.monotonic()
+        self.condition = threading.Condition()
+        self.thread: Optional[threading.Thread] = None
+        self.stopped = False
+        self.refreshed = 0
+        self.skipped = 0
+        self.failed = 0
+        self.last_error: Optional[str] = None
+        if self.symbols:
+            self.start()
+
+    def start(self) -> None:
+        with self.condition:
+            if self.thread is None and not self.stopped:
+                self.thread = threading.Thread(target=self.run, name="cache-refresh", daemon=True)
+                self.thread.start()
+
+    def stop(self) -> None:
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+
+    def submit(self, key: Hashable, refresh: Callable[[], Any]) -> bool:
+        """Queue a refresh of a stale entry. Returns False if one is already queued for key."""
+        with self.condition:
+            if key in self.urgent:
+                return False
+            self.urgent[key] = refresh
+            self.condition.notify_all()
+        self.start()
+        return True
+
+    def watch(self, symbols: Iterable[str]) -> None:
+        with self.condition:
+            self.symbols.update(symbols)
+            self.condition.notify_all()
+        if self.symbols:
+            self.start()
+
+    def unwatch(self, symbols: Iterable[str]) -> None:
+        with self.condition:
+            self.symbols.difference_update(symbols)
+
+    def next_task(self) -> Optional[Tuple[Hashable, Callable[[], Any], bool]]:
+        """Wait for the next refresh to run: (key, refresh, whether it is a watched entry). None once stopped."""
+        with self.condition:
+            while not self.stopped:
+                if self.urgent:
+                    key, refresh = self.urgent.popitem(last=False)
+                    return key, refresh, False
+                now = time.monotonic()
+                if self.symbols and now >= self.next_slot:
+                    if not self.cycle:
+                        self.cycle = [call for symbol in sorted(self.symbols) for call in self.watched_calls(symbol).values()]
+                        self.spacing = self.interval / max(1, len(self.cycle))
+                    self.next_slot = max(self.next_slot + self.spacing, now)
+                    key, refresh = self.cycle.pop(0)
+                    return key, refresh, True
+                self.condition.wait(timeout=self.next_slot - now if self.symbols else None)
+            return None
+
+    def run(self) -> None:
+        while True:
+            task = self.next_task()
+            if task is None:
+                return
+            key, refresh, watched = task
+            expires_in = self.expires_in(key)
+            if watched and expires_in is not None and expires_in > self.interval:
+                self.skipped += 1
+                continue
+            try:
+                refresh()
+                self.refreshed += 1
+            except Exception as e:
+                # The stale value keeps being served until its grace period ends
+                self.failed += 1
+                self.last_error = f"{key}: {e}"
+
+    def stats(self) -> dict:
+        with self.condition:
+            return {
+                "watched_symbols": len(self.symbols),
+                "interval_seconds": self.interval,
+                "queued": len(self.urgent),
+                "refreshed": self.refreshed,
+                "skipped": self.skipped,
+                "failed": self.failed,
+                "last_error": self.last_error,
+            }
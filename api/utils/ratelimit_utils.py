@@ -0,0 +1,165 @@
+import os
+import time
+import heapq
+import itertools
+import threading
+from typing import Annotated, Any, Callable, Optional
+from utils.executor_utils import UpstreamTimeoutError, current_deadline
+
+
+class UpstreamRateLimitError(Exception):
+    """Raised when an upstream keeps rejecting calls as rate limited after all retries."""
+
+
+class RateLimiter:
+    """Token bucket shared by every call to one upstream, handing out tokens by priority.
+
+    Callers block in acquire() until a token is available; lower priority values are
+    served first (e.g. interactive quote lookups before bulk news fetches). Background
+    callers can ask for a reserve, only taking a token while more than that many are left,
+    so the bucket keeps refilling for the requests arriving after them. When the
+    upstream answers 429/5xx, report_throttled() pauses the bucket with an exponential
+    backoff, so the client settles at the quota instead of oscillating through failures.
+    """
+
+    def __init__(
+        self,
+        name: Annotated[str, "upstream name, e.g. 'finnhub'"],
+        rate_per_minute: Annotated[float, "sustained number of calls allowed per minute"],
+        burst: Annotated[int, "maximum number of calls allowed back to back"],
+        max_backoff: Annotated[float, "upper bound in seconds of the pause after repeated throttling"] = 60.0,
+    ):
+        self.name = name
+        self.rate = rate_per_minute / 60.0
+        self.burst = max(1, burst)
+        self.max_backoff = max_backoff
+        self.tokens = float(self.burst)
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0
+        self.backoff = 0.0
+        self.condition = threading.Condition()
+        self.waiters = []
+        self.sequence = itertools.count()
+        self.granted = 0
+        self.throttled = 0
+        self.abandoned = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def acquire(
+        self,
+        priority: Annotated[int, "lower values are served first"] = 1,
+        deadline: Annotated[Optional[float], "time.monotonic() at which to give up, default to the executor call's"] = None,
+        reserve: Annotated[float, "tokens left in the bucket for other callers"] = 0.0,
+    ) -> float:
+        """Block until this caller may issue one upstream call. Returns the time spent waiting.
+        Raises UpstreamTimeoutError once the deadline passes, leaving the queue so no token is spent for nobody."""
+        started_at = time.monotonic()
+        if deadline is None:
+            deadline = current_deadline()
+        ticket = (priority, next(self.sequence))
+        with self.condition:
+            heapq.heappush(self.waiters, ticket)
+            while True:
+                now = time.monotonic()
+                self.refill(now)
+                if self.waiters[0] == ticket and self.tokens >= 1 + reserve and now >= self.blocked_until:
+                    heapq.heappop(self.waiters)
+                    self.tokens -= 1
+                    waited = now - started_at
+                    self.granted += 1
+                    self.total_wait += waited
+                    self.max_wait = max(self.max_wait, waited)
+                    self.condition.notify_all()
+                    return waited
+                if deadline is not None and now >= deadline:
+                    self.waiters.remove(ticket)
+                    heapq.heapify(self.waiters)
+                    self.abandoned += 1
+                    self.condition.notify_all()
+                    raise UpstreamTimeoutError(f"{self.name} call gave up after waiting {now - started_at:.1f}s for the rate limit")
+                if self.waiters[0] == ticket:
+                    delay = max(self.blocked_until - now, (1 + reserve - self.tokens) / self.rate if self.rate else 1.0)
+                else:
+                    delay = None
+                if deadline is not None:
+                    delay = deadline - now if delay is None else min(delay, deadline - now)
+                self.condition.wait(timeout=delay)
+
+    def available(self) -> float:
+        """Tokens that can be handed out right now, 0 while the bucket is paused or callers are queued."""
+        with self.condition:
+            now = time.monotonic()
+            self.refill(now)
+            if now < self.blocked_until or self.waiters:
+                return 0.0
+            return self.tokens
+
+    def report_success(self) -> None:
+        with self.condition:
+            self.backoff = 0.0
+
+    def report_throttled(self, retry_after: Annotated[Optional[float], "delay requested by the upstream, in seconds"] = None) -> None:
+        """Pause the bucket after a 429/5xx answer, doubling the pause on consecutive failures."""
+        with self.condition:
+            self.throttled += 1
+            self.backoff = min(self.max_backoff, self.backoff * 2 if self.backoff else 1.0)
+            pause = max(self.backoff, retry_after or 0.0)
+            self.blocked_until = max(self.blocked_until, time.monotonic() + pause)
+            self.tokens = 0.0
+            self.condition.notify_all()
+
+    def call(
+        self,
+        func: Annotated[Callable[[], Any], "performs the upstream call"],
+        priority: Annotated[int, "lower values are served first"] = 1,
+        throttle_delay: Annotated[
+            Callable[[Exception], Optional[float]],
+            "returns a retry delay (0 if unknown) when an exception means the upstream is throttling, else None",
+        ] = lambda e: None,
+        max_retries: Annotated[int, "number of retries after a throttled call"] = 3,
+        reserve: Annotated[float, "tokens left in the bucket for other callers"] = 0.0,
+    ) -> Any:
+        """Run func under the rate limit, retrying with backoff while the upstream reports throttling."""
+        for attempt in range(max_retries + 1):
+            self.acquire(priority, reserve=reserve)
+            try:
+                result = func()
+            except Exception as e:
+                retry_after = throttle_delay(e)
+                if retry_after is None:
+                    raise
+                self.report_throttled(retry_after)
+                if attempt == max_retries:
+                    raise UpstreamRateLimitError(f"{self.name} is rate limiting requests, try again later: {e}")
+                continue
+            self.report_success()
+            return result
+
+    def stats(self) -> dict:
+        with self.condition:
+            return {
+                "rate_per_minute": round(self.rate * 60, 2),
+                "burst": self.burst,
+                "queue_depth": len(self.waiters),
+                "granted": self.granted,
+                "throttled": self.throttled,
+                "abandoned": self.abandoned,
+                "avg_wait_seconds": round(self.total_wait / self.granted, 4) if self.granted else 0.0,
+                "max_wait_seconds": round(self.max_wait, 4),
+                "backoff_seconds": self.backoff,
+            }
+
+
+def rate_limiter_from_env(name: str, rate_per_minute: float, burst: int) -> RateLimiter:
+    """RateLimiter for an upstream, overridable with <NAME>_RATE_LIMIT_PER_MINUTE / <NAME>_RATE_LIMIT_BURST in .env."""
+    prefix = name.upper()
+    return RateLimiter(
+        name,
+        rate_per_minute=float(os.environ.get(f"{prefix}_RATE_LIMIT_PER_MINUTE", rate_per_minute)),
+        burst=int(os.environ.get(f"{prefix}_RATE_LIMIT_BURST", burst)),
+    )
@@ -1,21 +1,68 @@
 import os 
-from typing import Annotated
-from dotenv import load_dotenv
+import re
+from typing import Annotated, Any, Iterator, List, Optional, Tuple
+from functools import lru_cache
 import sys
-from sec_api import ExtractorApi
-from utils.finnhub_utils import FinnhubUtils
+from utils.other_utils import load_env
+from utils.finnhub_utils import get_finnhub_utils
+from utils.section_store import get_section_store, CHUNK_CHARS
+from utils.filing_index import get_filing_index
+from utils.passage_index import get_passage_index
+from utils.ratelimit_utils import rate_limiter_from_env
+from utils.metrics_utils import timed_upstream
+from utils.http_utils import get_http_session
 
-load_dotenv(".env")
+@lru_cache(maxsize=None)
+def get_sec_api_rate_limiter():
+    load_env()
+    return rate_limiter_from_env("sec_api", rate_per_minute=60, burst=5)
+
+def sec_api_throttle_delay(e: Exception) -> Optional[float]:
+    """Retry delay if e is a sec_api 429/5xx answer ("API error: <status> - ..."), None for any other error."""
+    match = re.match(r"API error: (\d+)", str(e))
+    if match is None:
+        return None
+    status_code = int(match.group(1))
+    return 0.0 if status_code == 429 or status_code >= 500 else None
+
+class PooledExtractorApi:
+    """sec_api ExtractorApi.get_section sending its requests through the shared keep-alive sec_api session.
+
+    Unlike ExtractorApi, it does not sleep and retry inline on 429: the error is raised as
+    "API error: 429 - ..." for the sec_api RateLimiter to back off.
+    """
+
+    def __init__(self, extractor: Annotated[Any, "sec_api.ExtractorApi holding the endpoint and api key"]):
+        self.api_endpoint = extractor.api_endpoint
+        self.proxies = extractor.proxies or None
+        self.http = get_http_session("sec_api")
+
+    def get_section(self, filing_url: str = "", section: str = "1A", return_type: str = "text") -> str:
+        if len(filing_url) == 0:
+            raise ValueError("filing_url must be present")
+        response = self.http.get(
+            self.api_endpoint,
+            params={"url": filing_url, "item": section, "type": return_type},
+            proxies=self.proxies,
+        )
+        if response.status_code != 200:
+            raise Exception(f"API error: {response.status_code} - {response.text}")
+        return response.text
 
 class SecApiUtils:
     def __init__(self):
         self.sec_api_extractor = self.init_sec_api_client()
+        self.section_store = get_section_store()
         
     def init_sec_api_client(self):
+        load_env()
         if os.environ.get("SEC_API_KEY") is None:
             raise Exception("Missing SEC_API_KEY in .env")
         else:
+            from sec_api import ExtractorApi
             sec_api_extractor = ExtractorApi(api_key=os.environ.get("SEC_API_KEY"))
+            if hasattr(sec_api_extractor, "api_endpoint"):
+                sec_api_extractor = PooledExtractorApi(sec_api_extractor)
             print("\nSuccessfully initialized sec api extractor!\n")
             return sec_api_extractor
     
@@ -35,6 +82,128 @@ class SecApiUtils:
         """
         Get a specific section of a 10-K report from the SEC API.
         """
+        report_address, section = self.store_10k_section(ticker_symbol, fyear, section, report_address)
+        return self.section_store.get(report_address, section)
+
+    def get_10k_section_manifest(
+        self,
+        ticker_symbol: Annotated[str, "ticker symbol"],
+        fyear: Annotated[str, "fiscal year of the 10-K report"],
+        section: Annotated[str | int, "Section of the 10-K report"],
+        report_address: Annotated[str, "URL of the 10-K report, if not specified, will get report url from fmp api"] = None,
+        chunk_size: Annotated[int, "number of characters per chunk"] = CHUNK_CHARS,
+    ) -> dict:
+        """
+        Describe a 10-K section (report url, length) and how many chunks of chunk_size characters it spans.
+        """
+        report_address, section = self.store_10k_section(ticker_symbol, fyear, section, report_address)
+        length = self.section_store.length(report_address, section)
+        return {
+            "report_url": report_address,
+            "length": length,
+            "chunk_size": chunk_size,
+            "num_chunks": -(-length // chunk_size),
+        }
+
+    def get_10k_section_range(
+        self,
+        ticker_symbol: Annotated[str, "ticker symbol"],
+        fyear: Annotated[str, "fiscal year of the 10-K report"],
+        section: Annotated[str | int, "Section of the 10-K report"],
+        offset: Annotated[int, "index of the first character to return"],
+        length: Annotated[int, "maximum number of characters to return"],
+        report_address: Annotated[str, "URL of the 10-K report, if not specified, will get report url from fmp api"] = None,
+    ) -> dict:
+        """
+        Get the characters [offset, offset + length) of a 10-K section, along with the section's total length.
+        """
+        report_address, section = self.store_10k_section(ticker_symbol, fyear, section, report_address)
+        return {
+            "section_text": self.section_store.read_range(report_address, section, offset, length),
+            "total_length": self.section_store.length(report_address, section),
+        }
+
+    def iter_10k_section(
+        self,
+        ticker_symbol: Annotated[str, "ticker symbol"],
+        fyear: Annotated[str, "fiscal year of the 10-K report"],
+        section: Annotated[str | int, "Section of the 10-K report"],
+        report_address: Annotated[str, "URL of the 10-K report, if not specified, will get report url from fmp api"] = None,
+        chunk_size: Annotated[int, "number of characters per yielded chunk"] = CHUNK_CHARS,
+    ) -> Iterator[str]:
+        """
+        Yield a 10-K section chunk by chunk. The section must already be stored, see store_10k_section.
+        """
+        report_address, section = self.resolve_10k_section(ticker_symbol, fyear, section, report_address)
+        for stored_chunk in self.section_store.iter_chunks(report_address, section):
+            for i in range(0, len(stored_chunk), chunk_size):
+                yield stored_chunk[i:i + chunk_size]
+
+    def store_10k_section(
+        self,
+        ticker_symbol: Annotated[str, "ticker symbol"],
+        fyear: Annotated[str, "fiscal year of the 10-K report"],
+        section: Annotated[str | int, "Section of the 10-K report"],
+        report_address: Annotated[str, "URL of the 10-K report, if not specified, will get report url from fmp api"] = None,
+    ) -> Tuple[str, str]:
+        """
+        Make sure a 10-K section is in the local section store, extracting it from the SEC API if needed.
+        Returns the (report url, section) key under which it is stored.
+        """
+        report_address, section = self.resolve_10k_section(ticker_symbol, fyear, section, report_address)
+
+        # Published 10-K sections never change, so a stored copy is always valid
+        if not self.section_store.touch(report_address, section):
+            def call():
+                with timed_upstream("sec_api", "get_section"):
+                    return self.sec_api_extractor.get_section(report_address, section, "text")
+
+            section_text = get_sec_api_rate_limiter().call(
+                call,
+                throttle_delay=sec_api_throttle_delay,
+            )
+            self.section_store.put(report_address, section, section_text)
+            self.index_10k_section(ticker_symbol, fyear, section, report_address, section_text)
+        elif not get_passage_index().has(report_address, section):
+            # Stored before passages were indexed
+            self.index_10k_section(ticker_symbol, fyear, section, report_address)
+
+        return report_address, section
+
+    def index_10k_section(
+        self,
+        ticker_symbol: Annotated[str, "ticker symbol"],
+        fyear: Annotated[Optional[str], "fiscal year of the 10-K report, looked up in the filing index if None"],
+        section: Annotated[str, "Section of the 10-K report"],
+        report_address: Annotated[str, "URL of the 10-K report"],
+        section_text: Annotated[Optional[str], "text of the section, read from the section store if None"] = None,
+    ) -> int:
+        """
+        Add a section to the local passage index searched by search_10k_passages. Returns the number of passages.
+        """
+        if section_text is None:
+            section_text = self.section_store.get(report_address, section) or ""
+        if not fyear:
+            filing = get_filing_index().find_by_url(report_address)
+            fyear = filing["filedDate"][:4] if filing else None
+        return get_passage_index().add(report_address, section, section_text, ticker_symbol, fyear)
+
+    def search_10k_passages(
+        self,
+        query: Annotated[str, "free-text query, e.g. 'supply chain risk'"],
+        k: Annotated[int, "number of passages to return"] = 5,
+        symbols: Annotated[Optional[List[str]], "only search reports of these symbols"] = None,
+        years: Annotated[Optional[List[str]], "only search reports of these fiscal years"] = None,
+        sections: Annotated[Optional[List[str]], "only search these sections"] = None,
+    ) -> List[dict]:
+        """
+        Search the passages of every 10-K section retrieved so far, best bm25 match first. No SEC API call is made.
+        """
+        if sections:
+            sections = [self.validate_10k_section(section) for section in sections]
+        return get_passage_index().search(query, k, symbols, years, sections)
+
+    def validate_10k_section(self, section: Annotated[str | int, "Section of the 10-K report"]) -> str:
         if isinstance(section, int):
             section = str(section)
         if section not in [
@@ -47,21 +216,42 @@ class SecApiUtils:
             raise ValueError(
                 "Section must be in [1, 1A, 1B, 2, 3, 4, 5, 6, 7, 7A, 8, 9, 9A, 9B, 10, 11, 12, 13, 14, 15]"
             )
+        return section
+
+    def resolve_10k_report_url(
+        self,
+        ticker_symbol: Annotated[str, "ticker symbol"],
+        fyear: Annotated[Optional[str], "fiscal year of the 10-K report, default to the latest one"] = None,
+    ) -> str:
+        """
+        Find the url of a 10-K report through the local filing index, falling back to Finnhub.
+        """
+        sec_report_dict = get_finnhub_utils().resolve_sec_filing(ticker_symbol, fyear)
+        if not sec_report_dict:
+            raise ValueError(f"No 10-K filing found for symbol {ticker_symbol}.")
+        return sec_report_dict['reportUrl']
+
+    def resolve_10k_section(
+        self,
+        ticker_symbol: Annotated[str, "ticker symbol"],
+        fyear: Annotated[str, "fiscal year of the 10-K report"],
+        section: Annotated[str | int, "Section of the 10-K report"],
+        report_address: Annotated[str, "URL of the 10-K report, if not specified, will get report url from fmp api"] = None,
+    ) -> Tuple[str, str]:
+        """
+        Validate the section and find the url of the 10-K report. Returns (report url, section).
+        """
+        section = self.validate_10k_section(section)
         
         if report_address is None:
-            finnhub = FinnhubUtils()
-            sec_filing_params = {
-                "symbol": ticker_symbol,
-            }
-            if fyear: 
-                sec_filing_params['from_date'] = f"{fyear}-01-01"
-                sec_filing_params['to_date'] = f"{fyear}-12-31"
-
-            sec_report_dict = finnhub.get_sec_filing(**sec_filing_params)
-            
-        section_text = self.sec_api_extractor.get_section(sec_report_dict['reportUrl'], section, "text")
-            
-        return section_text
+            report_address = self.resolve_10k_report_url(ticker_symbol, fyear)
+
+        return report_address, section
+
+@lru_cache(maxsize=None)
+def get_sec_api_utils() -> SecApiUtils:
+    """Process-wide SecApiUtils, constructed on first use."""
+    return SecApiUtils()
 
 if __name__ == "__main__":
     if len(sys.argv) < 3:
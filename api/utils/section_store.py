@@ -0,0 +1,161 @@
+import os
+import time
+import zlib
+import sqlite3
+import tempfile
+from functools import lru_cache
+from typing import Annotated, Iterator, Optional
+from utils.sqlite_utils import create_database, thread_connection
+
+
+DEFAULT_STORE_PATH = os.path.join(tempfile.gettempdir(), "ai-agent-cache", "sec_sections.sqlite3")
+
+# Sections are split into fixed-size character chunks, each compressed on its own,
+# so large sections can be read back piece by piece instead of all at once.
+CHUNK_CHARS = 64 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sections (
+    report_url TEXT NOT NULL,
+    section TEXT NOT NULL,
+    length INTEGER NOT NULL,
+    num_chunks INTEGER NOT NULL,
+    stored_size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    PRIMARY KEY (report_url, section)
+);
+CREATE TABLE IF NOT EXISTS section_chunks (
+    report_url TEXT NOT NULL,
+    section TEXT NOT NULL,
+    chunk_index INTEGER NOT NULL,
+    data BLOB NOT NULL,
+    PRIMARY KEY (report_url, section, chunk_index)
+);
+CREATE INDEX IF NOT EXISTS sections_last_access ON sections (last_access);
+"""
+
+
+class SectionStore:
+    """Durable SQLite store of extracted 10-K sections, keyed by report URL and section.
+
+    A published 10-K section never changes, so entries do not expire; they are only
+    evicted (least recently read first) once the store grows beyond max_bytes. The
+    database runs in WAL mode so several worker processes can share the same file.
+    """
+
+    def __init__(
+        self,
+        path: Annotated[Optional[str], "path of the SQLite database file"] = None,
+        max_bytes: Annotated[Optional[int], "compressed size above which old sections are evicted"] = None,
+        mmap_size: Annotated[Optional[int], "bytes of the database file to memory-map for reads, 0 to disable"] = None,
+    ):
+        self.path = path or os.environ.get("SEC_SECTION_STORE_PATH", DEFAULT_STORE_PATH)
+        self.max_bytes = max_bytes if max_bytes is not None else int(os.environ.get("SEC_SECTION_STORE_MAX_MB", 512)) * 1024 * 1024
+        self.mmap_size = mmap_size if mmap_size is not None else int(os.environ.get("SEC_SECTION_STORE_MMAP_SIZE", 256 * 1024 * 1024))
+        create_database(self.path, SCHEMA, mmap_size=int(self.mmap_size))
+
+    def connection(self) -> sqlite3.Connection:
+        """Return this thread's connection to the store, opening it on first use."""
+        return thread_connection(self.path, mmap_size=int(self.mmap_size))
+
+    def get(self, report_url: str, section: str) -> Optional[str]:
+        """Return the full text of a stored section, or None if it is not in the store."""
+        if not self.touch(report_url, section):
+            return None
+        return "".join(self.iter_chunks(report_url, section))
+
+    def length(self, report_url: str, section: str) -> Optional[int]:
+        """Number of characters of a stored section, or None if it is not in the store."""
+        row = self.connection().execute(
+            "SELECT length FROM sections WHERE report_url = ? AND section = ?", (report_url, section)
+        ).fetchone()
+        return row[0] if row else None
+
+    def read_range(self, report_url: str, section: str, offset: int, length: int) -> str:
+        """Return the characters [offset, offset + length) of a stored section, decompressing only the chunks they span."""
+        start_chunk = offset // CHUNK_CHARS
+        end_chunk = -(-(offset + length) // CHUNK_CHARS)
+        text = "".join(self.iter_chunks(report_url, section, start_chunk, end_chunk))
+        start = offset - start_chunk * CHUNK_CHARS
+        return text[start:start + length]
+
+    def iter_chunks(self, report_url: str, section: str, start_chunk: int = 0, end_chunk: Optional[int] = None) -> Iterator[str]:
+        """Yield the decompressed chunks [start_chunk, end_chunk) of a stored section, one at a time."""
+        index = start_chunk
+        while end_chunk is None or index < end_chunk:
+            # Fetch the connection on every step, a streaming response may resume this generator on another thread
+            row = self.connection().execute(
+                "SELECT data FROM section_chunks WHERE report_url = ? AND section = ? AND chunk_index = ?",
+                (report_url, section, index),
+            ).fetchone()
+            if row is None:
+                return
+            yield zlib.decompress(row[0]).decode("utf-8")
+            index += 1
+
+    def touch(self, report_url: str, section: str) -> bool:
+        """Mark a section as recently read. Returns False if it is not in the store."""
+        with self.connection() as conn:
+            cursor = conn.execute(
+                "UPDATE sections SET last_access = ? WHERE report_url = ? AND section = ?",
+                (time.time(), report_url, section),
+            )
+            return cursor.rowcount > 0
+
+    def put(self, report_url: str, section: str, text: str) -> None:
+        """Store a section (replacing any previous copy) and evict old sections if the store is full."""
+        chunks = [
+            zlib.compress(text[i:i + CHUNK_CHARS].encode("utf-8"))
+            for i in range(0, max(len(text), 1), CHUNK_CHARS)
+        ]
+        now = time.time()
+        with self.connection() as conn:
+            conn.execute("DELETE FROM section_chunks WHERE report_url = ? AND section = ?", (report_url, section))
+            conn.executemany(
+                "INSERT INTO section_chunks (report_url, section, chunk_index, data) VALUES (?, ?, ?, ?)",
+                [(report_url, section, i, chunk) for i, chunk in enumerate(chunks)],
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO sections (report_url, section, length, num_chunks, stored_size, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (report_url, section, len(text), len(chunks), sum(map(len, chunks)), now, now),
+            )
+        self.evict(keep=(report_url, section))
+
+    def evict(self, keep: Optional[tuple] = None) -> int:
+        """Drop least recently read sections, except keep, until the store fits in max_bytes. Returns the number dropped."""
+        with self.connection() as conn:
+            total = conn.execute("SELECT COALESCE(SUM(stored_size), 0) FROM sections").fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+            evicted = 0
+            rows = conn.execute("SELECT report_url, section, stored_size FROM sections ORDER BY last_access").fetchall()
+            for report_url, section, stored_size in rows:
+                if total <= self.max_bytes:
+                    break
+                if (report_url, section) == keep:
+                    continue
+                conn.execute("DELETE FROM section_chunks WHERE report_url = ? AND section = ?", (report_url, section))
+                conn.execute("DELETE FROM sections WHERE report_url = ? AND section = ?", (report_url, section))
+                total -= stored_size
+                evicted += 1
+            return evicted
+
+    def stats(self) -> dict:
+        count, length, stored_size = self.connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(length), 0), COALESCE(SUM(stored_size), 0) FROM sections"
+        ).fetchone()
+        return {
+            "path": self.path,
+            "sections": count,
+            "text_chars": length,
+            "stored_bytes": stored_size,
+            "max_bytes": self.max_bytes,
+        }
+
+
+@lru_cache(maxsize=None)
+def get_section_store() -> SectionStore:
+    """Process-wide SectionStore, opened on first use."""
+    return SectionStore()
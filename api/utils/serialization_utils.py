@@ -0,0 +1,62 @@
+import json
+import math
+from typing import Annotated, Any, Dict
+from starlette.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def clean_value(value: Any) -> Any:
+    """JSON-friendly scalar: NaN becomes None, dates become yyyy-mm-dd strings."""
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if hasattr(value, "strftime"):
+        return value.strftime("%Y-%m-%d")
+    return value
+
+
+def frame_columns_to_dict(frame: Annotated[Any, "pandas DataFrame, e.g. a yfinance statement"]) -> Dict[str, Dict[str, Any]]:
+    """Convert a DataFrame to {column: {row: value}} in one pass over its values, without copying or
+    transposing it. Column labels (statement periods) and NaN values are cleaned once, here."""
+    rows = [str(row) for row in frame.index]
+    values = frame.to_numpy().T.tolist()
+    return {
+        clean_value(column): {row: clean_value(value) for row, value in zip(rows, column_values)}
+        for column, column_values in zip(frame.columns, values)
+    }
+
+
+def encode_default(value: Any) -> Any:
+    """json fallback for what it cannot serialize natively: numpy arrays and scalars (NaN as null), else str."""
+    if hasattr(value, "tolist") and hasattr(value, "dtype"):
+        if value.dtype.kind == "f":
+            import numpy as np
+            return np.where(np.isnan(value), None, value).tolist()
+        return value.tolist()
+    return str(value)
+
+
+def dumps(payload: Any) -> bytes:
+    """Serialize a response payload to JSON bytes, with orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=encode_default).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON response serialized in a single pass by dumps.
+
+    Returning it from a handler also skips FastAPI's response_model validation and
+    re-serialization, which is worth it for large free-form dicts such as financials.
+    The payload is kept so /api/py/batch can embed it in its own response.
+    """
+
+    def __init__(self, content: Any, **kwargs: Any):
+        self.payload = content
+        super().__init__(content, **kwargs)
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,39 @@
+import asyncio
+from typing import Annotated, Any, Awaitable, Callable, Dict, Hashable
+
+
+class SingleFlight:
+    """Coalesce identical concurrent calls: while a call for a key is in flight, later
+    callers with the same key wait for that call instead of starting their own, and
+    all of them receive its result (or its exception)."""
+
+    def __init__(self):
+        self.in_flight: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(
+        self,
+        key: Annotated[Hashable, "identity of the call, e.g. (upstream, function, normalized args)"],
+        factory: Annotated[Callable[[], Awaitable[Any]], "starts the call when no identical call is in flight"],
+    ) -> Any:
+        task = self.in_flight.get(key)
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(factory())
+            self.in_flight[key] = task
+            task.add_done_callback(lambda done: self.forget(key, done))
+        else:
+            self.coalesced += 1
+        # Shield the shared call so one waiter being cancelled does not cancel it for the others
+        return await asyncio.shield(task)
+
+    def forget(self, key: Hashable, task: asyncio.Future) -> None:
+        if self.in_flight.get(key) is task:
+            del self.in_flight[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved in case every waiter was cancelled
+            task.exception()
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self.in_flight), "calls": self.calls, "coalesced": self.coalesced}
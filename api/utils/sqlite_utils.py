@@ -0,0 +1,40 @@
+import os
+import sqlite3
+import threading
+from typing import Annotated, Any
+
+
+# Connections opened by each thread, by database path and pragmas
+local = threading.local()
+
+
+def thread_connection(path: Annotated[str, "path of the SQLite database file"], **pragmas: Any) -> sqlite3.Connection:
+    """Return this thread's connection to a database, opening it on first use.
+
+    Connections run in WAL mode with synchronous=NORMAL, so several threads and worker
+    processes can read while one writes; pragmas are applied on top, e.g. mmap_size=2**28.
+    """
+    key = (os.path.abspath(path), tuple(sorted(pragmas.items())))
+    connections = getattr(local, "connections", None)
+    if connections is None:
+        connections = local.connections = {}
+    conn = connections.get(key)
+    if conn is None:
+        conn = sqlite3.connect(path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        for name, value in pragmas.items():
+            conn.execute(f"PRAGMA {name}={value}")
+        connections[key] = conn
+    return conn
+
+
+def create_database(
+    path: Annotated[str, "path of the SQLite database file"],
+    schema: Annotated[str, "CREATE ... IF NOT EXISTS statements"],
+    **pragmas: Any,
+) -> None:
+    """Create the directory and the tables of a database if they do not exist yet."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with thread_connection(path, **pragmas) as conn:
+        conn.executescript(schema)
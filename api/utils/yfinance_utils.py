@@ -1,24 +1,121 @@
+import os
 import sys
-from typing import Annotated, Any
-from pandas import DataFrame
-import pandas as pd
-import yfinance as yf
+import time
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Annotated, Any, Dict, Sequence
+from utils.other_utils import load_env
+from utils.cache_utils import TTLCache
+from utils.serialization_utils import frame_columns_to_dict
+from utils.metrics_utils import timed_upstream
+
+# yf.Ticker attribute holding each statement, per reporting frequency
+STATEMENT_ATTRIBUTES = {
+    "income_statement": {"annual": "financials", "quarterly": "quarterly_financials"},
+    "balance_sheet": {"annual": "balance_sheet", "quarterly": "quarterly_balance_sheet"},
+    "cash_flow": {"annual": "cashflow", "quarterly": "quarterly_cashflow"},
+}
+
+
+class TickerPool:
+    """Bounded LRU pool of yf.Ticker objects, reused across requests for the same symbol.
+
+    A ticker keeps its HTTP session and memoizes what it scraped, so reusing it saves the
+    setup of every call; it is replaced after max_age seconds so statements get refreshed.
+    """
+
+    def __init__(
+        self,
+        max_size: Annotated[int, "maximum number of tickers kept"] = 128,
+        max_age: Annotated[float, "seconds after which a ticker is replaced by a new one"] = 6 * 60 * 60,
+    ):
+        self.max_size = max_size
+        self.max_age = max_age
+        self.tickers: "OrderedDict[str, tuple]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    def get(self, symbol: Annotated[str, "ticker symbol"]) -> Any:
+        with self.lock:
+            entry = self.tickers.get(symbol)
+            if entry is not None and time.monotonic() - entry[0] < self.max_age:
+                self.tickers.move_to_end(symbol)
+                self.reused += 1
+                return entry[1]
+
+        import yfinance as yf
+        ticker = yf.Ticker(symbol)
+        with self.lock:
+            self.tickers[symbol] = (time.monotonic(), ticker)
+            self.tickers.move_to_end(symbol)
+            while len(self.tickers) > self.max_size:
+                self.tickers.popitem(last=False)
+            self.created += 1
+        return ticker
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {"size": len(self.tickers), "max_size": self.max_size, "created": self.created, "reused": self.reused}
+
+
+@lru_cache(maxsize=None)
+def get_ticker_pool() -> TickerPool:
+    """Process-wide TickerPool, overridable with YFINANCE_TICKER_POOL_SIZE / YFINANCE_CACHE_TTL in .env."""
+    load_env()
+    return TickerPool(
+        max_size=int(os.environ.get("YFINANCE_TICKER_POOL_SIZE", 128)),
+        max_age=float(os.environ.get("YFINANCE_CACHE_TTL", 6 * 60 * 60)),
+    )
+
+@lru_cache(maxsize=None)
+def get_statement_cache() -> TTLCache:
+    """Parsed statements, keyed by (symbol, statement, freq), shared by every YFinanceUtils."""
+    load_env()
+    return TTLCache(max_size=int(os.environ.get("YFINANCE_CACHE_SIZE", 1024)))
+
 
 class YFinanceUtils:
     def __init__(self, symbol: Annotated[str, "ticker symbol"]):
-        self.symbol = symbol 
+        self.symbol = symbol
         self.yfinance_ticker = self.init_yfinance_client(symbol)
-    
+
     def init_yfinance_client(self, symbol: str) -> Any:
-        ticker = yf.Ticker(symbol)
-        return ticker
-    
-    def get_income_stmt(self) -> DataFrame:
+        return get_ticker_pool().get(symbol)
+
+    def get_statement(
+        self,
+        statement: Annotated[str, "income_statement / balance_sheet / cash_flow"],
+        freq: Annotated[str, "reporting frequency: annual / quarterly"] = "annual",
+    ) -> dict:
+        """Retrieve a financial statement as {period: {line item: value}}, from the cache when it was parsed recently."""
+        if statement not in STATEMENT_ATTRIBUTES:
+            raise ValueError(f"Invalid statement {statement}. Please specify one of {', '.join(STATEMENT_ATTRIBUTES)}.")
+        if freq not in ["annual", "quarterly"]:
+            raise ValueError(f"Invalid reporting frequency {freq}. Please specify either 'annual' or 'quarterly'.")
+
+        attribute = STATEMENT_ATTRIBUTES[statement][freq]
+
+        def load():
+            with timed_upstream("yfinance", attribute):
+                frame = getattr(self.yfinance_ticker, attribute)
+            return frame_columns_to_dict(frame)
+
+        ttl = float(os.environ.get("YFINANCE_CACHE_TTL", 6 * 60 * 60))
+        return get_statement_cache().get_or_set((self.symbol, statement, freq), load, ttl)
+
+    def get_statements(
+        self,
+        statements: Annotated[Sequence[str], "statements to retrieve, among income_statement / balance_sheet / cash_flow"] = tuple(STATEMENT_ATTRIBUTES),
+        freq: Annotated[str, "reporting frequency: annual / quarterly"] = "annual",
+    ) -> Dict[str, dict]:
+        """Retrieve several statements of the stock with the same ticker, as {statement: {period: {line item: value}}}."""
+        return {statement: self.get_statement(statement, freq) for statement in statements}
+
+    def get_income_stmt(self) -> dict:
         """Retrieve the latest income statement for the stock defined by the initialized ticker symbol."""
-        income_stmt = self.yfinance_ticker.financials
-        income_stmt_df = pd.DataFrame(income_stmt)
-        income_stmt_dict = income_stmt_df.transpose().to_dict(orient='index')
-        return income_stmt_dict
+        return self.get_statement("income_statement")
 
 if __name__ == "__main__":
     if len(sys.argv) < 2:
@@ -27,6 +124,6 @@ if __name__ == "__main__":
 
     symbol = sys.argv[1]
     yfin = YFinanceUtils(symbol)
-    
+
     income_stmt = yfin.get_income_stmt()
-    # print(income_stmt)
\ No newline at end of file
+    # print(income_stmt)
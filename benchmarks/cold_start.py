@@ -0,0 +1,105 @@
+"""Cold start benchmark of the FastAPI app in api/main.py.
+
+Each endpoint is measured in a fresh Python process, the way a serverless function
+starts: time to import main, then latency of the first request sent to the app.
+
+    python benchmarks/cold_start.py --symbol AAPL
+    python benchmarks/cold_start.py --max-import-ms 500 --top-imports 15
+
+The first request calls the live upstream APIs, so the keys in api/.env are needed.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+API_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api")
+
+ENDPOINTS = {
+    "get_company_profile": "/api/py/get_company_profile?symbol={symbol}",
+    "get_company_news": "/api/py/get_company_news?symbol={symbol}",
+    "get_basic_financials": "/api/py/get_basic_financials?symbol={symbol}",
+    "get_basic_financials_history": "/api/py/get_basic_financials_history?symbol={symbol}&freq=annual",
+    "get_sec_filing": "/api/py/get_sec_filing?symbol={symbol}",
+    "get_income_statement": "/api/py/get_income_statement?symbol={symbol}",
+    "get_10k_section": "/api/py/get_10k_section?ticker_symbol={symbol}&section=1A",
+}
+
+
+def measure_in_this_process(url: str) -> dict:
+    """Import main and send it one request, timing both. Runs inside the child process."""
+    import asyncio
+    sys.path.insert(0, API_DIR)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from asgi_client import asgi_request
+
+    started_at = time.perf_counter()
+    import main
+    imported_at = time.perf_counter()
+    status, body = asyncio.run(asgi_request(main.app, "GET", url))
+    answered_at = time.perf_counter()
+    return {
+        "import_ms": round((imported_at - started_at) * 1000, 1),
+        "first_request_ms": round((answered_at - imported_at) * 1000, 1),
+        "status": status,
+        "response_bytes": len(body),
+    }
+
+
+def measure_in_fresh_process(url: str) -> dict:
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", url],
+        cwd=API_DIR, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def slowest_imports(top: int) -> list:
+    """Modules with the highest cumulative import time when importing main, from python -X importtime."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=API_DIR, capture_output=True, text=True,
+    ).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        rows.append((int(cumulative) / 1000, module.strip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold start benchmark of the FastAPI app.")
+    parser.add_argument("--symbol", default="AAPL")
+    parser.add_argument("--endpoints", nargs="*", choices=list(ENDPOINTS), default=list(ENDPOINTS))
+    parser.add_argument("--max-import-ms", type=float, help="exit with status 1 if importing main takes longer")
+    parser.add_argument("--top-imports", type=int, default=0, help="also list the N slowest imports")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_in_this_process(args.child)))
+        return
+
+    print(f"{'endpoint':<32}{'import ms':>12}{'first request ms':>20}{'status':>8}")
+    slowest_import = 0.0
+    for name in args.endpoints:
+        result = measure_in_fresh_process(ENDPOINTS[name].format(symbol=args.symbol))
+        slowest_import = max(slowest_import, result["import_ms"])
+        print(f"{name:<32}{result['import_ms']:>12}{result['first_request_ms']:>20}{result['status']:>8}")
+
+    if args.top_imports:
+        print(f"\n{'cumulative ms':>14}  module")
+        for cumulative_ms, module in slowest_imports(args.top_imports):
+            print(f"{cumulative_ms:>14.1f}  {module}")
+
+    if args.max_import_ms is not None and slowest_import > args.max_import_ms:
+        print(f"\nImport of main took {slowest_import} ms, above the {args.max_import_ms} ms budget.")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""Local stand-ins for finnhub.Client, yfinance.Ticker and sec_api.ExtractorApi.
+
+install() swaps them into the real modules, so api/main.py runs unchanged but never
+leaves the machine. Latency, payload size and error rate are configurable to mimic
+slow, large or flaky upstreams.
+"""
+import os
+import time
+import random
+import hashlib
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+
+@dataclass
+class FakeUpstreamConfig:
+    latency_ms: float = 50.0
+    jitter: float = 0.2
+    payload_scale: float = 1.0
+    error_rate: float = 0.0
+    error_status: int = 500
+    seed: int = 0
+
+
+class FakeResponse:
+    """Just enough of requests.Response for FinnhubAPIException."""
+
+    def __init__(self, status_code: int):
+        self.status_code = status_code
+        self.headers = {}
+        self.text = '{"error": "fake upstream error"}'
+
+    def json(self):
+        return {"error": "fake upstream error"}
+
+
+class FakeUpstream:
+    calls = 0
+    lock = threading.Lock()
+
+    def __init__(self, config: FakeUpstreamConfig):
+        self.config = config
+        self.random = random.Random(config.seed)
+
+    def respond(self, kind: str) -> None:
+        """Sleep for the configured latency, then fail with the configured probability."""
+        with FakeUpstream.lock:
+            FakeUpstream.calls += 1
+            jitter = 1 + self.random.uniform(-self.config.jitter, self.config.jitter)
+            failed = self.random.random() < self.config.error_rate
+        time.sleep(self.config.latency_ms / 1000 * jitter)
+        if failed:
+            self.fail(kind)
+
+    def fail(self, kind: str) -> None:
+        raise Exception(f"API error: {self.config.error_status} - fake {kind} failure")
+
+    def scaled(self, n: int) -> int:
+        return max(1, int(n * self.config.payload_scale))
+
+
+def symbol_seed(symbol: str) -> int:
+    return int(hashlib.md5(symbol.encode()).hexdigest()[:8], 16)
+
+
+class FakeFinnhubClient(FakeUpstream):
+    def __init__(self, api_key=None, proxies=None, config: FakeUpstreamConfig = None):
+        super().__init__(config or FakeUpstreamConfig())
+
+    def fail(self, kind: str) -> None:
+        from finnhub.exceptions import FinnhubAPIException
+        raise FinnhubAPIException(FakeResponse(self.config.error_status))
+
+    def company_profile2(self, symbol):
+        self.respond("company_profile2")
+        return {
+            "name": f"{symbol} Corp", "finnhubIndustry": "Technology", "country": "US", "ipo": "1990-01-01",
+            "marketCapitalization": 1000.0 + symbol_seed(symbol) % 100000, "currency": "USD",
+            "shareOutstanding": 100.0, "ticker": symbol, "exchange": "NASDAQ",
+        }
+
+    def quote(self, symbol):
+        self.respond("quote")
+        return {"c": 100 + symbol_seed(symbol) % 400 + self.random.random()}
+
+    def company_news(self, symbol, _from, to):
+        self.respond("company_news")
+        now = datetime.now()
+        return [
+            {
+                "id": symbol_seed(symbol) + i, "datetime": int((now - timedelta(hours=i)).timestamp()),
+                "headline": f"{symbol} headline {i}", "url": f"https://news.example.com/{symbol}/{i}",
+                "source": "Fake", "summary": "Lorem ipsum " * 30,
+            }
+            for i in range(self.scaled(20))
+        ]
+
+    def company_basic_financials(self, symbol, metric):
+        self.respond("company_basic_financials")
+        seed = symbol_seed(symbol)
+        periods = [str((datetime(2025, 12, 31) - timedelta(days=91 * i)).date()) for i in range(self.scaled(40))]
+        series = {f"metric{m}": [{"period": p, "v": (seed % 97 + m + i) / 10} for i, p in enumerate(periods)] for m in range(self.scaled(60))}
+        return {
+            "metric": {f"metric{m}Snapshot": (seed % 89 + m) / 10 for m in range(self.scaled(130))},
+            "series": {"annual": series, "quarterly": series},
+        }
+
+    def filings(self, symbol='', cik='', access_number='', form='', _from='', to=''):
+        self.respond("filings")
+        return [
+            {
+                "accessNumber": f"{symbol}-{year}", "symbol": symbol, "form": form or "10-K",
+                "filedDate": f"{year}-11-01 00:00:00", "reportUrl": f"https://sec.example.com/{symbol}/{year}/10k.htm",
+            }
+            for year in range(2020, 2026)
+        ]
+
+    def company_peers(self, symbol):
+        self.respond("company_peers")
+        return [symbol] + [f"PEER{i}" for i in range(self.scaled(10))]
+
+
+class FakeExtractorApi(FakeUpstream):
+    def __init__(self, api_key=None, proxies=None, config: FakeUpstreamConfig = None):
+        super().__init__(config or FakeUpstreamConfig())
+
+    def get_section(self, filing_url="", section="1A", return_type="text"):
+        self.respond("get_section")
+        paragraph = f"Item {section} of {filing_url}: supply chain, competition and regulatory risk. " * 10
+        return "\n\n".join([paragraph] * self.scaled(120))
+
+
+class FakeTicker(FakeUpstream):
+    def __init__(self, ticker, session=None, config: FakeUpstreamConfig = None):
+        super().__init__(config or FakeUpstreamConfig())
+        self.ticker = ticker
+
+    def statement(self, kind: str, freq: str = "YE"):
+        import pandas as pd
+        self.respond(kind)
+        columns = pd.date_range(end="2025-09-30", periods=4, freq=freq)[::-1]
+        rows = [f"{kind} line {i}" for i in range(self.scaled(45))]
+        return pd.DataFrame([[1e9 * (i + j) for j in range(4)] for i in range(len(rows))], index=rows, columns=columns)
+
+    @property
+    def financials(self):
+        return self.statement("financials")
+
+    @property
+    def balance_sheet(self):
+        return self.statement("balance_sheet")
+
+    @property
+    def cashflow(self):
+        return self.statement("cashflow")
+
+    @property
+    def quarterly_financials(self):
+        return self.statement("quarterly_financials", "QE")
+
+    @property
+    def quarterly_balance_sheet(self):
+        return self.statement("quarterly_balance_sheet", "QE")
+
+    @property
+    def quarterly_cashflow(self):
+        return self.statement("quarterly_cashflow", "QE")
+
+
+def install(config: FakeUpstreamConfig) -> None:
+    """Replace the real upstream clients with the fakes, for every client created afterwards."""
+    import finnhub
+    import sec_api
+    import yfinance
+
+    os.environ.setdefault("FINNHUB_API_KEY", "fake")
+    os.environ.setdefault("SEC_API_KEY", "fake")
+    finnhub.Client = lambda api_key=None, proxies=None: FakeFinnhubClient(api_key, proxies, config)
+    sec_api.ExtractorApi = lambda api_key=None, proxies=None: FakeExtractorApi(api_key, proxies, config)
+    yfinance.Ticker = lambda ticker, session=None: FakeTicker(ticker, session, config)
@@ -0,0 +1,127 @@
+"""Offline load test of api/main.py against local upstream stand-ins.
+
+The FastAPI app runs in-process and is driven through ASGI by concurrent workers,
+while finnhub, yfinance and sec_api are replaced by the fakes in fake_upstreams.py.
+Reports requests/sec, p50/p95/p99 latency, status codes and memory per endpoint.
+
+    python benchmarks/load_test.py --concurrency 32 --requests 500 --latency-ms 80
+    python benchmarks/load_test.py --endpoints get_10k_section --payload-scale 4 --no-cache
+    python benchmarks/load_test.py --error-rate 0.05 --error-status 503
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import resource
+import tempfile
+import tracemalloc
+from collections import Counter
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, "..", "api"))
+sys.path.insert(0, BENCHMARKS_DIR)
+
+from asgi_client import asgi_request
+from fake_upstreams import FakeUpstream, FakeUpstreamConfig, install
+
+ENDPOINTS = {
+    "get_company_profile": "/api/py/get_company_profile?symbol={symbol}",
+    "get_company_news": "/api/py/get_company_news?symbol={symbol}",
+    "get_basic_financials": "/api/py/get_basic_financials?symbol={symbol}",
+    "get_basic_financials_history": "/api/py/get_basic_financials_history?symbol={symbol}&freq=quarterly",
+    "get_peer_comparison": "/api/py/get_peer_comparison?symbol={symbol}",
+    "get_sec_filing": "/api/py/get_sec_filing?symbol={symbol}",
+    "get_income_statement": "/api/py/get_income_statement?symbol={symbol}",
+    "get_financial_statements": "/api/py/get_financial_statements?symbols={symbol}&freq=quarterly",
+    "get_10k_section": "/api/py/get_10k_section?ticker_symbol={symbol}&section=7",
+}
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+async def load_endpoint(app, template: str, requests: int, concurrency: int, symbols: int) -> dict:
+    latencies = []
+    statuses = Counter()
+    response_bytes = 0
+    pending = iter(range(requests))
+
+    async def worker():
+        nonlocal response_bytes
+        for i in pending:
+            url = template.format(symbol=f"SYM{i % symbols}")
+            started_at = time.perf_counter()
+            status, body = await asgi_request(app, "GET", url)
+            latencies.append((time.perf_counter() - started_at) * 1000)
+            statuses[status] += 1
+            response_bytes += len(body)
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started_at
+    latencies.sort()
+    return {
+        "rps": requests / elapsed,
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "statuses": dict(statuses),
+        "avg_bytes": response_bytes / requests,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test with fake upstreams.")
+    parser.add_argument("--endpoints", nargs="*", choices=list(ENDPOINTS), default=list(ENDPOINTS))
+    parser.add_argument("--requests", type=int, default=300, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--symbols", type=int, default=20, help="number of distinct symbols requested")
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="mean fake upstream latency")
+    parser.add_argument("--jitter", type=float, default=0.2, help="relative latency jitter")
+    parser.add_argument("--payload-scale", type=float, default=1.0, help="multiplier on fake payload sizes")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of upstream calls that fail")
+    parser.add_argument("--error-status", type=int, default=500, help="HTTP status of failed upstream calls")
+    parser.add_argument("--no-cache", action="store_true", help="disable the Finnhub and yfinance response caches")
+    parser.add_argument("--rate-limit-per-minute", type=float, default=1e9, help="client-side upstream rate limit")
+    parser.add_argument("--trace-memory", action="store_true", help="report tracemalloc peak per endpoint (slower)")
+    args = parser.parse_args()
+
+    os.environ["FINNHUB_RATE_LIMIT_PER_MINUTE"] = os.environ["SEC_API_RATE_LIMIT_PER_MINUTE"] = str(args.rate_limit_per_minute)
+    os.environ["FINNHUB_RATE_LIMIT_BURST"] = os.environ["SEC_API_RATE_LIMIT_BURST"] = str(max(args.concurrency, 10))
+    store_dir = tempfile.mkdtemp(prefix="load-test-")
+    os.environ["SEC_SECTION_STORE_PATH"] = os.path.join(store_dir, "sections.sqlite3")
+    os.environ["SEC_FILING_INDEX_PATH"] = os.path.join(store_dir, "filings.sqlite3")
+    os.environ["SEC_PASSAGE_INDEX_PATH"] = os.path.join(store_dir, "passages.sqlite3")
+    if args.no_cache:
+        os.environ["FINNHUB_CACHE_SIZE"] = os.environ["YFINANCE_CACHE_SIZE"] = "0"
+    install(FakeUpstreamConfig(
+        latency_ms=args.latency_ms, jitter=args.jitter, payload_scale=args.payload_scale,
+        error_rate=args.error_rate, error_status=args.error_status,
+    ))
+
+    import main as api_main
+
+    print(f"{'endpoint':<30}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'avg KiB':>9}{'rss MiB':>9}{'peak MiB':>10}  upstream calls / statuses")
+    loop = asyncio.new_event_loop()
+    for name in args.endpoints:
+        calls_before = FakeUpstream.calls
+        if args.trace_memory:
+            tracemalloc.start()
+        result = loop.run_until_complete(load_endpoint(api_main.app, ENDPOINTS[name], args.requests, args.concurrency, args.symbols))
+        peak = "-"
+        if args.trace_memory:
+            peak = f"{tracemalloc.get_traced_memory()[1] / 2**20:.1f}"
+            tracemalloc.stop()
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(
+            f"{name:<30}{result['rps']:>9.1f}{result['p50']:>9.1f}{result['p95']:>9.1f}{result['p99']:>9.1f}"
+            f"{result['avg_bytes'] / 1024:>9.1f}{rss:>9.1f}{peak:>10}  {FakeUpstream.calls - calls_before} / {result['statuses']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
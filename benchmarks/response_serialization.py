@@ -0,0 +1,79 @@
+"""Per-endpoint cost of turning a handler's payload into response bytes.
+
+"before" is the previous path: FastAPI validates the payload against the route's
+response_model, serializes it, and starlette's JSONResponse encodes it with the
+stdlib json module (plus the json.dumps / json.loads round trip that
+get_basic_financials used to do). "after" is FastJSONResponse, encoded once by orjson.
+
+    python benchmarks/response_serialization.py --iterations 200
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+
+from fastapi.routing import APIRoute, serialize_response
+from starlette.responses import JSONResponse
+from utils.serialization_utils import FastJSONResponse
+
+
+def payloads() -> dict:
+    metrics = {f"metric{i}": i * 1.5 for i in range(130)}
+    history = {f"{2000 + y}-{m:02d}-30": {f"metric{i}": i * 0.1 for i in range(40)} for y in range(25) for m in (3, 6, 9, 12)}
+    income_statement = {f"{2025 - y}-09-30": {f"Line Item {i}": i * 1e9 for i in range(45)} for y in range(4)}
+    news = [{"date": "20251001120000", "headline": "h" * 80, "url": "https://example.com/" + str(i), "source": "s", "summary": "s" * 400} for i in range(50)]
+    return {
+        "/api/py/get_company_profile": {"symbol": "AAPL", "company_profile": "p" * 700},
+        "/api/py/get_company_news": {"symbol": "AAPL", "news": news},
+        "/api/py/get_basic_financials": {"symbol": "AAPL", "financials": metrics},
+        "/api/py/get_basic_financials_history": {"symbol": "AAPL", "financials": history},
+        "/api/py/get_income_statement": {"symbol": "AAPL", "income_statement": income_statement},
+        "/api/py/get_10k_section": {"symbol": "AAPL", "section": "7", "fiscal_year": None, "section_text": "Risk factors. " * 25000},
+    }
+
+
+loop = asyncio.new_event_loop()
+
+
+def before(route: APIRoute, payload: dict) -> bytes:
+    if route.path == "/api/py/get_basic_financials":
+        payload = {**payload, "financials": json.loads(json.dumps(payload["financials"], indent=2))}
+    content = loop.run_until_complete(serialize_response(field=route.response_field, response_content=payload))
+    return JSONResponse(content).body
+
+
+def after(route: APIRoute, payload: dict) -> bytes:
+    return FastJSONResponse(payload).body
+
+
+def per_request_us(func, iterations: int) -> float:
+    func()
+    started_at = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - started_at) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Response serialization micro-benchmark.")
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    import main as api_main
+    routes = {route.path: route for route in api_main.app.routes if isinstance(route, APIRoute)}
+
+    print(f"{'endpoint':<40}{'bytes':>10}{'before us':>12}{'after us':>12}{'speedup':>10}")
+    for path, payload in payloads().items():
+        route = routes[path]
+        before_us = per_request_us(lambda: before(route, payload), args.iterations)
+        after_us = per_request_us(lambda: after(route, payload), args.iterations)
+        size = len(after(route, payload))
+        print(f"{path:<40}{size:>10}{before_us:>12.1f}{after_us:>12.1f}{before_us / after_us:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
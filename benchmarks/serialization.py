@@ -0,0 +1,93 @@
+"""CPU and allocation cost of building the financial history and income statement payloads.
+
+Compares the previous DataFrame round-trips with the direct dict building now used by
+FinnhubUtils.get_basic_financials_history and YFinanceUtils.get_income_stmt, on synthetic
+payloads shaped like the Finnhub and Yahoo responses.
+
+    python benchmarks/serialization.py --metrics 60 --periods 120 --iterations 200
+"""
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "api"))
+
+import numpy as np
+import pandas as pd
+from utils.financials_utils import BasicFinancialsTable
+from utils.serialization_utils import frame_columns_to_dict
+
+
+def basic_financials_payload(metrics: int, periods: int) -> dict:
+    dates = [str(d.date()) for d in pd.date_range(end="2025-12-31", periods=periods, freq="QE")][::-1]
+    series = {f"metric{m}": [{"period": d, "v": float(m + i)} for i, d in enumerate(dates)] for m in range(metrics)}
+    return {"metric": {}, "series": {"quarterly": series, "annual": series}}
+
+
+def income_statement_frame(rows: int, periods: int) -> pd.DataFrame:
+    values = np.random.default_rng(0).normal(size=(rows, periods)) * 1e9
+    values[::7, 0] = np.nan
+    columns = pd.date_range(end="2025-09-30", periods=periods, freq="YE")[::-1]
+    return pd.DataFrame(values, index=[f"Line Item {i}" for i in range(rows)], columns=columns)
+
+
+def history_with_dataframe(payload: dict, start_date: str, end_date: str) -> dict:
+    """Previous implementation: defaultdict -> DataFrame -> to_dict(orient='index')."""
+    output_dict = defaultdict(dict)
+    for metric, value_list in payload["series"]["quarterly"].items():
+        for value in value_list:
+            if start_date <= value["period"] <= end_date:
+                output_dict[metric].update({value["period"]: value["v"]})
+    financials_output = pd.DataFrame(output_dict).rename_axis(index="date")
+    return financials_output.to_dict(orient="index")
+
+
+def history_direct(table: BasicFinancialsTable, start_date: str, end_date: str) -> dict:
+    return table.history_by_date("quarterly", start_date, end_date)
+
+
+def income_statement_with_dataframe(frame: pd.DataFrame) -> dict:
+    """Previous implementation: copy -> transpose -> to_dict(orient='index')."""
+    return pd.DataFrame(frame).transpose().to_dict(orient="index")
+
+
+def measure(label: str, func, iterations: int) -> None:
+    func()
+    started_at = time.process_time()
+    for _ in range(iterations):
+        func()
+    cpu_us = (time.process_time() - started_at) / iterations * 1e6
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<40}{cpu_us:>14.1f}{peak / 1024:>16.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Payload building benchmark.")
+    parser.add_argument("--metrics", type=int, default=40)
+    parser.add_argument("--periods", type=int, default=120)
+    parser.add_argument("--statement-rows", type=int, default=45)
+    parser.add_argument("--statement-periods", type=int, default=4)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    payload = basic_financials_payload(args.metrics, args.periods)
+    table = BasicFinancialsTable("BENCH", payload)
+    frame = income_statement_frame(args.statement_rows, args.statement_periods)
+    start_date, end_date = "1995-01-01", "2030-12-31"
+
+    print(f"{'payload':<40}{'cpu us/req':>14}{'peak alloc KiB':>16}")
+    measure("history (DataFrame)", lambda: history_with_dataframe(payload, start_date, end_date), args.iterations)
+    measure("history (direct)", lambda: history_direct(table, start_date, end_date), args.iterations)
+    measure("income statement (DataFrame)", lambda: income_statement_with_dataframe(frame), args.iterations)
+    measure("income statement (direct)", lambda: frame_columns_to_dict(frame), args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,14 @@
 import {
     IncomeStatementResponse,
     SecSectionResponse,
+    SecSectionRangeResponse,
+    SecPassageSearchResponse,
     BasicFinancialsResponse,
     CompanyProfileResponse,
     CompanyNewsResponse,
-    SecFilingResponse
+    SecFilingResponse,
+    BatchOperation,
+    BatchResponse
 } from "@/lib/tools/tools_types"
 
 
@@ -68,6 +72,65 @@ export async function fetchSecSection(ticker_symbol: string, section: string, fy
 }
 
 
+export async function fetchSecSectionRange(ticker_symbol: string, section: string, offset: number = 0, length?: number, fyear?: string): Promise<SecSectionRangeResponse> {
+    const baseUrl = process.env.NEXT_PUBLIC_API_BASE_URL;
+    const url = new URL(`${baseUrl}/api/py/get_10k_section/range`);
+
+    url.searchParams.append('ticker_symbol', ticker_symbol);
+    url.searchParams.append('section', section);
+    url.searchParams.append('offset', offset.toString());
+
+    if (length) {
+        url.searchParams.append('length', length.toString());
+    }
+
+    if (fyear) {
+        url.searchParams.append('fyear', fyear);
+    }
+
+    const response = await fetch(url.toString());
+
+    if (!response.ok) {
+        const errorDetails = await response.json();
+        throw new Error(`Error fetching 10-K section range: ${errorDetails.detail}`);
+    }
+
+    const data: SecSectionRangeResponse = await response.json();
+    return data;
+}
+
+
+export async function fetchSecPassages(query: string, k: number = 5, symbols?: string[], years?: string[], sections?: string[]): Promise<SecPassageSearchResponse> {
+    const baseUrl = process.env.NEXT_PUBLIC_API_BASE_URL;
+    const url = new URL(`${baseUrl}/api/py/search_10k_passages`);
+
+    url.searchParams.append('query', query);
+    url.searchParams.append('k', k.toString());
+
+    if (symbols && symbols.length > 0) {
+        url.searchParams.append('symbols', symbols.join(','));
+    }
+
+    if (years && years.length > 0) {
+        url.searchParams.append('years', years.join(','));
+    }
+
+    if (sections && sections.length > 0) {
+        url.searchParams.append('sections', sections.join(','));
+    }
+
+    const response = await fetch(url.toString());
+
+    if (!response.ok) {
+        const errorDetails = await response.json();
+        throw new Error(`Error searching 10-K passages: ${errorDetails.detail}`);
+    }
+
+    const data: SecPassageSearchResponse = await response.json();
+    return data;
+}
+
+
 export async function fetchBasicFinancials(symbol: string, selectedColumns?: string[]): Promise<BasicFinancialsResponse> {
     const baseUrl = process.env.NEXT_PUBLIC_API_BASE_URL;
     const params = new URLSearchParams({ symbol });
@@ -103,7 +166,7 @@ export async function fetchCompanyProfile(symbol: string): Promise<CompanyProfil
 }
 
 
-export async function fetchCompanyNews(symbol: string, start_date?: string, end_date?: string, max_news_num: number = 10): Promise<CompanyNewsResponse> {
+export async function fetchCompanyNews(symbol: string, start_date?: string, end_date?: string, max_news_num: number = 10, cursor?: string): Promise<CompanyNewsResponse> {
     const baseUrl = process.env.NEXT_PUBLIC_API_BASE_URL;
     const params = new URLSearchParams({ symbol });
 
@@ -117,6 +180,10 @@ export async function fetchCompanyNews(symbol: string, start_date?: string, end_
 
     params.append('max_news_num', max_news_num.toString());
 
+    if (cursor) {
+        params.append('cursor', cursor);
+    }
+
     const response = await fetch(`${baseUrl}/api/py/get_company_news?${params.toString()}`);
 
     if (!response.ok) {
@@ -151,4 +218,21 @@ export async function fetchSecFiling(symbol: string, form?: string, fromDate?: s
 
     const data: SecFilingResponse = await response.json();
     return data;
-}
\ No newline at end of file
+}
+
+export async function fetchBatch(operations: BatchOperation[]): Promise<BatchResponse> {
+    const baseUrl = process.env.NEXT_PUBLIC_API_BASE_URL;
+    const response = await fetch(`${baseUrl}/api/py/batch`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ operations }),
+    });
+
+    if (!response.ok) {
+        const errorDetails = await response.json();
+        throw new Error(`Error running batch: ${errorDetails.detail}`);
+    }
+
+    const data: BatchResponse = await response.json();
+    return data;
+}
@@ -10,6 +10,31 @@ export interface SecSectionResponse {
     section_text: string;
 }
 
+export interface SecSectionRangeResponse {
+    symbol: string;
+    section: string;
+    fiscal_year?: string;
+    offset: number;
+    total_length: number;
+    next_offset: number | null;
+    section_text: string;
+}
+
+export interface SecPassage {
+    symbol: string;
+    year: string | null;
+    section: string;
+    report_url: string;
+    passage_index: number;
+    text: string;
+    score: number;
+}
+
+export interface SecPassageSearchResponse {
+    query: string;
+    passages: SecPassage[];
+}
+
 export interface BasicFinancialsResponse {
     symbol: string;
     financials: Record<string, any>;
@@ -29,6 +54,7 @@ export interface CompanyNewsResponse {
         url: string;
         summary: string;
     }>;
+    next_cursor?: string | null;
 }
 
 export interface SecFiling {
@@ -46,3 +72,20 @@ export interface SecFilingResponse {
     symbol: string;
     filing: SecFiling;
 }
+
+export interface BatchOperation {
+    tool: string;
+    args: Record<string, any>;
+}
+
+export interface BatchItemResult {
+    tool: string;
+    ok: boolean;
+    result?: Record<string, any>;
+    status_code?: number;
+    error?: string;
+}
+
+export interface BatchResponse {
+    results: BatchItemResult[];
+}